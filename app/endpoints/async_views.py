@@ -0,0 +1,81 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from endpoints.pagination import StandardPagination
+
+
+class AsyncAPIView(View):
+    """
+    База для async-версий read-only эндпоинтов (DRF 3.14 async-представления не поддерживает).
+    Аутентификация и права - те же классы, что и в APIView; они ходят в БД синхронно,
+    поэтому выполняются одним вызовом через sync_to_async. Ответ кодируется JSONEncoder'ом DRF,
+    чтобы формат совпадал с sync-версией. Под WSGI такие представления тоже работают.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = []
+    pagination_class = StandardPagination
+
+    def check_access(self, request):
+        for authentication in self.authentication_classes:
+            try:
+                result = authentication().authenticate(request)
+            except exceptions.APIException as e:
+                return e.status_code, e.detail
+            if result is not None:
+                request.user, request.auth = result
+                break
+
+        for permission in self.permission_classes:
+            if not permission().has_permission(request, self):
+                if not request.user.is_authenticated:
+                    return 401, exceptions.NotAuthenticated.default_detail
+                return 403, getattr(permission, 'message', exceptions.PermissionDenied.default_detail)
+        return None
+
+    async def dispatch(self, request, *args, **kwargs):
+        error = await sync_to_async(self.check_access)(request)
+        if error:
+            status_code, detail = error
+            return self.response(detail if isinstance(detail, dict) else {'detail': detail}, status=status_code)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def response(self, data, status=200):
+        return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+    async def paginate(self, request, queryset, serializer_class):
+        """Аналог StandardPagination для async ORM: тот же формат count/next/previous/results."""
+        pagination = self.pagination_class
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = int(request.GET.get(pagination.page_size_query_param, pagination.page_size))
+        except ValueError:
+            return self.response({'detail': 'Invalid page.'}, status=404)
+        page_size = max(1, min(page_size, pagination.max_page_size))
+
+        count = await queryset.acount()
+        if page < 1 or (page > 1 and (page - 1) * page_size >= count):
+            return self.response({'detail': 'Invalid page.'}, status=404)
+
+        offset = (page - 1) * page_size
+        objects = [obj async for obj in queryset[offset:offset + page_size]]
+
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+
+        return self.response({
+            'count': count,
+            'next': next_url,
+            'previous': previous_url,
+            'results': serializer_class(objects, many=True).data,
+        })
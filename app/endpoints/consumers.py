@@ -0,0 +1,84 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from my_db.enums import UserStatus, StaffRole
+from my_db.models import Order, Warehouse, StaffProfile
+from utils.events import warehouse_group, order_group
+
+
+@database_sync_to_async
+def get_user(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return AnonymousUser()
+
+
+class JWTQueryAuthMiddleware:
+    """Браузерный WebSocket не передаёт заголовки, поэтому access-токен приходит в ?token=..."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        scope['user'] = await get_user(token[0]) if token else AnonymousUser()
+        return await self.app(scope, receive, send)
+
+
+class EventConsumer(AsyncJsonWebsocketConsumer):
+    """Только чтение: клиент подписывается на группу и получает {"event": ..., "data": ...}."""
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated or not await self.has_access(user):
+            await self.close(code=4003)
+            return
+
+        self.group = self.get_group()
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def event_message(self, message):
+        await self.send_json({'event': message['event'], 'data': message['data']})
+
+
+class WarehouseConsumer(EventConsumer):
+    """ws/warehouse/<id>/ - перемещения (quantity) и остатки (stock) склада."""
+
+    def get_group(self):
+        return warehouse_group(self.scope['url_route']['kwargs']['pk'])
+
+    @database_sync_to_async
+    def has_access(self, user):
+        if user.status != UserStatus.STAFF:
+            return False
+        staff = StaffProfile.objects.filter(user=user).first()
+        if staff is None:
+            return False
+        if staff.role in [StaffRole.DIRECTOR, StaffRole.TECHNOLOGIST]:
+            return True
+        return Warehouse.objects.filter(id=self.scope['url_route']['kwargs']['pk'], staffs=staff).exists()
+
+
+class OrderConsumer(EventConsumer):
+    """ws/order/<id>/ - выполнение операций по заказу (work)."""
+
+    def get_group(self):
+        return order_group(self.scope['url_route']['kwargs']['pk'])
+
+    @database_sync_to_async
+    def has_access(self, user):
+        if user.status == UserStatus.STAFF:
+            return True
+        return Order.objects.filter(id=self.scope['url_route']['kwargs']['pk'], client__user=user).exists()
@@ -0,0 +1,220 @@
+import cProfile
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from utils.metrics import RequestMetrics, registry, check_query_budget
+from utils.profiling import get_sampler, save_profile
+from utils.request_log import RequestLogWriter, sanitize, user_role
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = '/metrics/'
+# запросы с паролями и токенами не записываются
+REQUEST_LOG_SKIP_PATHS = ('/api/v1/token/',)
+
+
+class RequestMetricsMiddleware:
+    """
+    Для каждого запроса считает SQL-запросы и время в БД, время представления, рендера JSON и размер ответа.
+    Результат - заголовок Server-Timing и накопленные метрики для /metrics/ (utils/metrics.py).
+    Эндпоинт определяется по view_name (для роутера - order-list, order-detail и т.п., иначе путь к классу),
+    по нему же задаются бюджеты QUERY_BUDGETS. Работает и под WSGI, и под ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == METRICS_PATH:
+            return self.get_response(request)
+
+        metrics = self.start(request)
+        with metrics.install():
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if request.path == METRICS_PATH:
+            return await self.get_response(request)
+
+        metrics = self.start(request)
+        stack = await sync_to_async(metrics.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, metrics)
+
+    def start(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        return metrics
+
+    def process_template_response(self, request, response):
+        # Response DRF рендерится после представления - отдельно замеряем сериализацию в JSON
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return response
+
+        render_started = time.perf_counter()
+        metrics.view_time = render_started - metrics.started
+
+        def rendered(response):
+            metrics.render_time = time.perf_counter() - render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics):
+        metrics.total_time = time.perf_counter() - metrics.started
+        if not metrics.view_time:
+            metrics.view_time = metrics.total_time
+        if not response.streaming:
+            metrics.size = len(response.content)
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, request.method, response.status_code, metrics)
+        response['Server-Timing'] = metrics.server_timing()
+        check_query_budget(view, request.method, metrics)
+        return response
+
+
+class RequestRecorderMiddleware:
+    """
+    Пишет API-запросы в JSONL (REQUEST_LOG_PATH) для воспроизведения командой replay_requests:
+    время, метод, путь с параметрами, маршрут, роль пользователя, статус, длительность и тело JSON
+    без паролей/токенов. Тела не-JSON запросов (файлы) не читаются и не записываются (body_skipped).
+    Без REQUEST_LOG_PATH отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_LOG_PATH:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.writer = RequestLogWriter(settings.REQUEST_LOG_PATH)
+
+    def __call__(self, request):
+        if not self.should_record(request):
+            return self.get_response(request)
+
+        body = None
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        # файлы и слишком большие тела не читаются, запрос помечается как невоспроизводимый
+        body_skipped = bool(length) and (request.content_type != 'application/json'
+                                         or length > settings.REQUEST_LOG_MAX_BODY)
+        if length and not body_skipped:
+            try:
+                body = sanitize(json.loads(request.body))
+            except ValueError:
+                body_skipped = True
+
+        started_at = timezone.now()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        self.writer.write({
+            'ts': started_at.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': match.view_name if match else '',
+            # пользователя из JWT DRF проставляет в исходный request уже внутри представления
+            'role': user_role(getattr(request, 'user', None)),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'content_type': request.content_type,
+            'body': body,
+            'body_skipped': body_skipped,
+        })
+        return response
+
+    def should_record(self, request):
+        if not request.path.startswith('/api/') or request.path.startswith(REQUEST_LOG_SKIP_PATHS):
+            return False
+        return random.random() < settings.REQUEST_LOG_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов в PROFILE_DIR, без него отключается целиком.
+    Каждый запрос сэмплируется StackSampler'ом (снимок стека раз в PROFILE_INTERVAL_MS из фонового потока),
+    профиль сохраняется, если запрос дольше PROFILE_SLOW_MS или попал в долю PROFILE_SAMPLE_RATE.
+    Доля PROFILE_CPROFILE_RATE вместо этого выполняется под cProfile (точные вызовы, но заметно медленнее).
+    Смотреть - командой profiles. Стоит после RequestMetricsMiddleware: берёт из него число SQL-запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        if random.random() < settings.PROFILE_CPROFILE_RATE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                pass  # Python 3.12+: cProfile уже работает в другом потоке - этот запрос только сэмплируется
+            else:
+                start = time.perf_counter()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profile.disable()
+                self.save(request, response, time.perf_counter() - start, 'cprofile', stats=pstats.Stats(profile))
+                return response
+
+        sampled = random.random() < settings.PROFILE_SAMPLE_RATE
+        sampler = get_sampler()
+        thread_id = threading.get_ident()
+        sampler.start(thread_id)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            folded = sampler.stop(thread_id)
+        duration = time.perf_counter() - start
+
+        if folded and (sampled or duration * 1000 >= settings.PROFILE_SLOW_MS):
+            self.save(request, response, duration, 'sampling', folded=folded)
+        return response
+
+    def save(self, request, response, duration, mode, folded=None, stats=None):
+        match = request.resolver_match
+        metrics = getattr(request, 'metrics', None)
+        meta = {
+            'ts': timezone.now().isoformat(),
+            'view': match.view_name if match else 'unresolved',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'queries': metrics.queries if metrics else None,
+            'db_ms': round(metrics.db_time * 1000, 1) if metrics else None,
+            'mode': mode,
+        }
+        try:
+            save_profile(meta, folded=folded, stats=stats)
+        except OSError:
+            # профилирование не должно ронять запрос
+            logger.exception('Не удалось сохранить профиль %s', meta['view'])
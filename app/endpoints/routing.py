@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import WarehouseConsumer, OrderConsumer
+
+websocket_urlpatterns = [
+    path('ws/warehouse/<int:pk>/', WarehouseConsumer.as_asgi()),
+    path('ws/order/<int:pk>/', OrderConsumer.as_asgi()),
+]
@@ -8,21 +8,27 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views.calculation import OperationTitleListView, ConsumableTitleListView, OperationDetailView, \
     ConsumableDetailView, CalculationViewSet, CalculationListView, ClientNameListView, ProductTitleList, \
-    GETProductInfoView
-from .views.dashboard import PlanCRUDView, StatisticView
+    GETProductInfoView, CalculationComputeView, CalculationPromoteView
+from .views.dashboard import PlanCRUDView, StatisticView, AsyncStatisticView, ScheduleView, \
+    EquipmentUtilizationView
+from .views.export import PaymentExportView, QuantityExportView, OrderExportView
+from .views.metrics import MetricsView
 from .views.nomenclature import GPListView, GPModelViewSet, PatternCRUDView, CombinationModelViewSet, GPDetailView, \
     OperationModelViewSet, EquipmentModelViewSet, MaterialListView, PatternListView, ProductListView, \
     EquipmentImageCRUDView, EquipmentServiceView, FileCRUDView, FileListView, MaterialListMyView
-from .views.order import OrderReadView, OrderModelViewSet, InvoiceDataView, ClientOrdersView
+from .views.order import OrderReadView, OrderModelViewSet, InvoiceDataView, ClientOrdersView, AsyncOrderListView
 from .views.payment import PaymentCreateView, SalaryInfoView, PaymentHistoryListView, PaymentFilesCreateView, \
-    SalaryCreateView, PaymentDetailView, MyPaymentHistoryListView, MyPaymentDetailView
+    SalaryCreateView, PaymentDetailView, MyPaymentHistoryListView, MyPaymentDetailView, SalaryBatchView, \
+    SalaryBatchStatusView
 from .views.sample import CombinationFileCRUDVIew, SampleCombinationListView, SampleOperationListView
+from .views.upload import ChunkedUploadView, ChunkedUploadDetailView, ChunkedUploadFinalizeView
 from .views.user_crud import StaffInfoView, StaffModelViewSet, ClientModelViewSet, ClientListView, ClientFileCRUDView, \
     StaffListView
 from .views.general import RankListView, SizeListView, RankModelViewSet, ColorModelViewSet, SizeModelViewSet
 from .views.warehouse import WarehouseModelViewSet, WarehouseMaterialListView, MaterialModelViewSet, StockInputView, \
     StockOutputView, StockDefectiveView, StockDefectiveFileView, StockOutputUpdateView, MovingListView, \
-    MovingDetailView, MyMaterialListView, WarehouseListView, QuantityHistoryListView, CreateMaterialsView
+    MovingDetailView, MyMaterialListView, WarehouseListView, QuantityHistoryListView, CreateMaterialsView, \
+    MaterialImportView, MaterialImportDetailView, AsyncQuantityHistoryListView
 from .views.work import WorkStaffListView, MyWorkListView, PartyCreateCRUDView, OrderInfoListView, PartyListView, \
     ProductInfoView, PartyInfoListView, ProductOperationListView, WorkCRUDView, WorkReadListView, \
     WorkReadDetailView
@@ -56,6 +62,7 @@ router.register('sample/operations/list', SampleOperationListView)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', MetricsView.as_view()),
 
     path('api/v1/', include([
         path('schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -98,6 +105,8 @@ urlpatterns = [
         path('warehouse/defective/files/', StockDefectiveFileView.as_view()),
         path('warehouse/list/', WarehouseListView.as_view()),
         path('warehouse/materials/create/', CreateMaterialsView.as_view()),
+        path('warehouse/materials/import/', MaterialImportView.as_view()),
+        path('warehouse/materials/import/<int:pk>/', MaterialImportDetailView.as_view()),
 
 
         path('work/staffs/list/', WorkStaffListView.as_view()),
@@ -113,6 +122,8 @@ urlpatterns = [
         path('payment/create/', PaymentCreateView.as_view()),
         path('payment/files/create/', PaymentFilesCreateView.as_view()),
         path('payment/salary/create/', SalaryCreateView.as_view()),
+        path('payment/salary/batch/', SalaryBatchView.as_view()),
+        path('payment/salary/batch/<str:task_id>/', SalaryBatchStatusView.as_view()),
         path('payment/salary-info/<int:pk>/', SalaryInfoView.as_view()),
         path('payment/history/list/<int:pk>/', PaymentHistoryListView.as_view()),
         path('payment/history/list/my/', MyPaymentHistoryListView.as_view()),
@@ -120,6 +131,21 @@ urlpatterns = [
         path('payment/history/detail/my/<int:pk>/', MyPaymentDetailView.as_view()),
 
         path('dashboard/statistic/', StatisticView.as_view()),
+        path('dashboard/schedule/', ScheduleView.as_view()),
+        path('dashboard/equipment/', EquipmentUtilizationView.as_view()),
+
+        # async-версии (Django async ORM), рассчитаны на запуск под ASGI, см. gunicorn.conf.py
+        path('async/dashboard/statistic/', AsyncStatisticView.as_view()),
+        path('async/order/list/', AsyncOrderListView.as_view()),
+        path('async/warehouse/history/list/', AsyncQuantityHistoryListView.as_view()),
+
+        path('export/payments/', PaymentExportView.as_view()),
+        path('export/warehouse/movements/', QuantityExportView.as_view()),
+        path('export/orders/', OrderExportView.as_view()),
+
+        path('upload/', ChunkedUploadView.as_view()),
+        path('upload/<int:pk>/', ChunkedUploadDetailView.as_view()),
+        path('upload/<int:pk>/finalize/', ChunkedUploadFinalizeView.as_view()),
 
         path('equipment/images/', EquipmentImageCRUDView.as_view()),
         path('equipment/services/', EquipmentServiceView.as_view()),
@@ -129,6 +155,8 @@ urlpatterns = [
         path('calculation/consumables/titles/', ConsumableTitleListView.as_view()),
         path('calculation/consumables/detail/<int:pk>/', ConsumableDetailView.as_view()),
         path('calculation/list/', CalculationListView.as_view()),
+        path('calculation/compute/', CalculationComputeView.as_view()),
+        path('calculation/<int:pk>/promote/', CalculationPromoteView.as_view()),
         path('calculation/clients/names/', ClientNameListView.as_view()),
         path('calculation/get-product-titles/', ProductTitleList.as_view()),
         path('calculation/get-product-info/', GETProductInfoView.as_view()),
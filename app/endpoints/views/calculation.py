@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status, mixins
 from rest_framework.generics import RetrieveAPIView, ListAPIView
@@ -10,9 +13,12 @@ from endpoints.pagination import StandardPagination
 from endpoints.permissions import IsDirectorAndTechnologist, IsStaff
 from my_db.enums import NomType
 from my_db.models import Operation, Nomenclature, Calculation, ClientProfile
+from serializers.nomenclature import GPDetailSerializer
 from serializers.calculation import OperationDetailSerializer, ConsumableDetailSerializer, CalculationSerializer, \
     CalculationListSerializer, ClientProfileListSerializer, ConsumableTitleListSerializer, GPListSerializer, \
-    GETProductInfoSerializer
+    GETProductInfoSerializer, CalculationComputeSerializer
+from utils.calculation import compute_calculation, promote_calculation
+from utils.nomenclature import has_cut_combination
 
 
 class OperationTitleListView(APIView):
@@ -57,6 +63,41 @@ class CalculationViewSet(mixins.CreateModelMixin,
     queryset = Calculation.objects.all()
 
 
+class CalculationComputeView(APIView):
+    """Себестоимость черновика калькуляции (материалы, работа по разрядам, доп. расходы) без сохранения."""
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(request=CalculationComputeSerializer())
+    def post(self, request):
+        serializer = CalculationComputeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(compute_calculation(serializer.validated_data), status=status.HTTP_200_OK)
+
+
+class CalculationPromoteView(APIView):
+    """Переводит калькуляцию в ГП с полной техкартой и привязывает её к созданному изделию."""
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(request=None, responses=GPDetailSerializer())
+    def post(self, request, pk):
+        with transaction.atomic():
+            calculation = get_object_or_404(Calculation.objects.select_for_update(), id=pk)
+            if calculation.nomenclature_id:
+                return Response({'error': 'Калькуляция уже переведена в изделие!'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if not has_cut_combination(calculation.combinations.values('status')):
+                return Response({'error': 'Добавьте комбинацию со статусом "КРОЙ".'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            nomenclature = promote_calculation(calculation)
+
+        nomenclature = Nomenclature.objects.prefetch_related(
+            Prefetch('combinations__operations',
+                     queryset=Operation.objects.select_related('nomenclature', 'equipment')),
+            'prices', 'consumables',
+        ).get(id=nomenclature.id)
+        return Response(GPDetailSerializer(nomenclature).data, status=status.HTTP_201_CREATED)
+
+
 class CalculationListFilter(filters.FilterSet):
     title = filters.CharFilter(lookup_expr="icontains")
     created_at = filters.DateFromToRangeFilter()
@@ -1,16 +1,18 @@
 import datetime
 
-from django.db.models import Sum, Count, F, Q
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from endpoints.async_views import AsyncAPIView
 from endpoints.permissions import IsDirectorAndTechnologist
-from my_db.enums import PaymentStatus
-from my_db.models import Plan, OrderProduct, Work, Payment, EquipmentService, Operation
+from my_db.models import Plan
 from serializers.dashboard import PlanSerializer
+from utils.dashboard import get_statistic, aget_statistic
+from utils.equipment import equipment_utilization
+from utils.scheduler import build_schedule
 
 
 class PlanCRUDView(viewsets.ModelViewSet):
@@ -26,93 +28,40 @@ class StatisticView(APIView):
         date = request.query_params.get('date')
         date = timezone.make_aware(datetime.datetime.strptime(date, "%d-%m-%Y")).month
 
-        plan = Plan.objects.filter(date__month=date).first()
-
-        order_products = OrderProduct.objects.filter(
-            order__created_at__month=date
-        ).select_related('nomenclature', 'order')
-
-        aggregation = order_products.aggregate(
-            income=Sum('true_price'),
-            consumption=Sum(F('true_cost_price')),
-            orders=Count('order_id', distinct=True),
-            produced=Sum('amounts__amount')  # Количество произведённых товаров
-        )
-        income = aggregation.get('income') or 0
-        consumption = aggregation.get('consumption') or 0
-        profit = income - consumption
-
-        work_qs = Work.objects.filter(
-            created_at__month=date
-        ).prefetch_related('details__combination', 'details__payment').select_related('staff')
-
-        operations_aggregation = work_qs.aggregate(
-            performance=Sum('details__amount'),
-            time=Sum(F('details__amount') * F('details__combination__operations__time')),
-        )
-
-        payments_qs = Payment.objects.filter(
-            staff__in=work_qs.values('details__staff').distinct(),
-            created_at__month=date
-        ).select_related('staff')
-
-        payments_aggregation = payments_qs.aggregate(
-            fine=Sum('amount', filter=Q(status__in=[
-        PaymentStatus.FINE, PaymentStatus.FINE_CHECKED
-            ])),  # Общая сумма штрафов
-            done=Sum('amount', filter=Q(status__in=[
-                PaymentStatus.SALARY,
-                PaymentStatus.ADVANCE,
-                PaymentStatus.ADVANCE_CHECKED,
-            ])),  # Общая сумма заработка
-        )
-
-        staff_count = work_qs.values('details__staff').distinct().count()
-        avg_performance = operations_aggregation['performance'] / staff_count if staff_count > 0 else 0
-
-        equipment_services_qs = EquipmentService.objects.filter(
-            created_at__month=date
-        ).select_related('equipment')
-
-        operations_qs = Operation.objects.filter(
-            equipment__services__created_at__month=date
-        ).select_related('equipment')
-
-        # Агрегация данных
-        equipment_service_aggregation = equipment_services_qs.aggregate(
-            service_cost=Sum('price')  # Суммарные расходы на обслуживание
-        )
-        operation_time_aggregation = operations_qs.aggregate(
-            total_time=Sum('time')  # Общее время работы оборудования
-        )
-
-        data = {
-            "order": {
-                "plan": {
-                    "income": plan.income_amount if plan else 0, # доход
-                    "orders": plan.order_amount if plan else 0  # количество заказов
-                },
-                "fact": {
-                    "income": income,  # доход
-                    "consumption": consumption,  # расход
-                    "profit": profit,  # прибыль
-                    "orders": aggregation.get('orders') or 0  # количество заказов
-                }
-            },
-            "staff": {
-                "avg_performance": avg_performance or 0,  # Средняя производительность
-                "performance": operations_aggregation['performance'] or 0,  # Количество операций
-                "fine": payments_aggregation['fine'] or 0,  # Сумма штрафов
-                "done": payments_aggregation['done'] or 0,  # Сумма заработка
-                "time": operations_aggregation['time'] or 0,  # Общее время работы
-            },
-            "product": {
-                "produced": aggregation.get('produced') or 0,  # сколько товаров создано
-            },
-            "machine": {
-                "time": operation_time_aggregation['total_time'] or 0,  # сколько по времени работала машина,
-                "service": equipment_service_aggregation['service_cost'] or 0  # сколько по деньгам ушло на тех обслуживание
-            }
-        }
+        data = get_statistic(date)
         return Response(data, status=status.HTTP_200_OK)
 
+
+
+class AsyncStatisticView(AsyncAPIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    async def get(self, request):
+        date = request.GET.get('date')
+        date = timezone.make_aware(datetime.datetime.strptime(date, "%d-%m-%Y")).month
+
+        data = await aget_statistic(date)
+        return self.response(data)
+
+
+class ScheduleView(APIView):
+    """Прогноз выполнения заказов в работе по загрузке сотрудников и разрядам, заказы под угрозой срыва срока."""
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    def get(self, request):
+        return Response(build_schedule(), status=status.HTTP_200_OK)
+
+
+class EquipmentUtilizationView(APIView):
+    """Загрузка оборудования за период (?from_date=&to_date= в формате dd-mm-YYYY, по умолчанию 30 дней)."""
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    def get(self, request):
+        to_date = request.query_params.get('to_date')
+        to_date = datetime.datetime.strptime(to_date, "%d-%m-%Y").date() if to_date else timezone.localdate()
+        from_date = request.query_params.get('from_date')
+        from_date = datetime.datetime.strptime(from_date, "%d-%m-%Y").date() if from_date \
+            else to_date - datetime.timedelta(days=30)
+        if from_date > to_date:
+            return Response({'detail': 'from_date позже to_date'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(equipment_utilization(from_date, to_date), status=status.HTTP_200_OK)
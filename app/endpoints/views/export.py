@@ -0,0 +1,130 @@
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from endpoints.permissions import IsDirectorAndTechnologist
+from my_db.enums import PaymentStatus, QuantityStatus, OrderStatus
+from my_db.models import Payment, QuantityNomenclature, OrderProductAmount
+from utils.export import stream_csv, EXPORT_CHUNK_SIZE
+
+DATE_PARAMETERS = [
+    OpenApiParameter(name="from_date", description="Дата с (dd-mm-YYYY)", required=False, type=str),
+    OpenApiParameter(name="to_date", description="Дата по (dd-mm-YYYY)", required=False, type=str),
+]
+
+
+def filter_by_dates(request, queryset, field):
+    from_date = request.query_params.get('from_date')
+    to_date = request.query_params.get('to_date')
+    if from_date:
+        from_date = timezone.make_aware(datetime.datetime.strptime(from_date, "%d-%m-%Y"))
+        queryset = queryset.filter(**{f'{field}__gte': from_date})
+    if to_date:
+        to_date = timezone.make_aware(datetime.datetime.strptime(to_date, "%d-%m-%Y") + datetime.timedelta(days=1))
+        queryset = queryset.filter(**{f'{field}__lt': to_date})
+    return queryset
+
+
+class PaymentExportView(APIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(
+        parameters=DATE_PARAMETERS + [
+            OpenApiParameter(name="staff", description="ID сотрудника", required=False, type=int),
+        ],
+        responses={200: {'type': 'string', 'format': 'binary'}}
+    )
+    def get(self, request):
+        payments = filter_by_dates(request, Payment.objects.all(), 'created_at')
+        staff_id = request.query_params.get('staff')
+        if staff_id:
+            payments = payments.filter(staff_id=staff_id)
+
+        statuses = dict(PaymentStatus.choices)
+        rows = (
+            (p_id, staff_id, f'{surname or ""} {name}'.strip(), statuses.get(status), amount, date_from, date_until,
+             timezone.localtime(created_at).strftime('%d-%m-%Y %H:%M'), comment)
+            for p_id, staff_id, name, surname, status, amount, date_from, date_until, created_at, comment
+            in payments.order_by('id').values_list(
+                'id', 'staff_id', 'staff__name', 'staff__surname', 'status', 'amount', 'date_from', 'date_until',
+                'created_at', 'comment'
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ['ID', 'ID сотрудника', 'Сотрудник', 'Статус', 'Сумма', 'Период с', 'Период по', 'Создано',
+                  'Комментарий']
+        return stream_csv('payments.csv', header, rows)
+
+
+class QuantityExportView(APIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(
+        parameters=DATE_PARAMETERS + [
+            OpenApiParameter(name="warehouse", description="ID склада", required=False, type=int),
+        ],
+        responses={200: {'type': 'string', 'format': 'binary'}}
+    )
+    def get(self, request):
+        lines = filter_by_dates(request, QuantityNomenclature.objects.all(), 'quantity__created_at')
+        warehouse_id = request.query_params.get('warehouse')
+        if warehouse_id:
+            lines = lines.filter(
+                Q(quantity__in_warehouse_id=warehouse_id) | Q(quantity__out_warehouse_id=warehouse_id)
+            )
+
+        statuses = dict(QuantityStatus.choices)
+        rows = (
+            (quantity_id, timezone.localtime(created_at).strftime('%d-%m-%Y %H:%M'), statuses.get(status),
+             out_warehouse, in_warehouse, order_id, nomenclature_id, vendor_code, title, amount, price, comment)
+            for quantity_id, created_at, status, out_warehouse, in_warehouse, order_id, nomenclature_id, vendor_code,
+            title, amount, price, comment
+            in lines.order_by('quantity_id', 'id').values_list(
+                'quantity_id', 'quantity__created_at', 'quantity__status', 'quantity__out_warehouse__title',
+                'quantity__in_warehouse__title', 'quantity__order_id', 'nomenclature_id',
+                'nomenclature__vendor_code', 'nomenclature__title', 'amount', 'price', 'comment'
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ['ID перемещения', 'Дата', 'Статус', 'Со склада', 'На склад', 'ID заказа', 'ID номенклатуры',
+                  'Артикул', 'Номенклатура', 'Количество', 'Цена', 'Комментарий']
+        return stream_csv('warehouse_movements.csv', header, rows)
+
+
+class OrderExportView(APIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(
+        parameters=DATE_PARAMETERS + [
+            OpenApiParameter(name="status", description="Статус заказа", required=False, type=int),
+        ],
+        responses={200: {'type': 'string', 'format': 'binary'}}
+    )
+    def get(self, request):
+        amounts = filter_by_dates(request, OrderProductAmount.objects.all(), 'order_product__order__created_at')
+        order_status = request.query_params.get('status')
+        if order_status:
+            amounts = amounts.filter(order_product__order__status=order_status)
+
+        statuses = dict(OrderStatus.choices)
+        rows = (
+            (order_id, client_name, company_title, statuses.get(status),
+             timezone.localtime(created_at).strftime('%d-%m-%Y %H:%M'),
+             timezone.localtime(deadline).strftime('%d-%m-%Y %H:%M'),
+             vendor_code, title, price, true_price, cost_price, true_cost_price, size, color, amount, defect)
+            for order_id, client_name, company_title, status, created_at, deadline, vendor_code, title, price,
+            true_price, cost_price, true_cost_price, size, color, amount, defect
+            in amounts.order_by('order_product__order_id', 'order_product_id', 'id').values_list(
+                'order_product__order_id', 'order_product__order__client__name',
+                'order_product__order__client__company_title', 'order_product__order__status',
+                'order_product__order__created_at', 'order_product__order__deadline',
+                'order_product__nomenclature__vendor_code', 'order_product__nomenclature__title',
+                'order_product__price', 'order_product__true_price', 'order_product__cost_price',
+                'order_product__true_cost_price', 'size__title', 'color__title', 'amount', 'defect'
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ['ID заказа', 'Клиент', 'Компания', 'Статус', 'Создан', 'Дедлайн', 'Артикул', 'Товар', 'Цена',
+                  'Факт. цена', 'Себестоимость', 'Факт. себестоимость', 'Размер', 'Цвет', 'Количество', 'Брак']
+        return stream_csv('orders.csv', header, rows)
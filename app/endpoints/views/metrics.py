@@ -0,0 +1,22 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from django.views import View
+
+from utils.metrics import registry
+
+
+class MetricsView(View):
+    """
+    Метрики текущего процесса в формате Prometheus. Без METRICS_TOKEN эндпоинт выключен,
+    Prometheus передаёт токен в Authorization: Bearer <token> (bearer_token в scrape_config).
+    """
+
+    def get(self, request):
+        if not settings.METRICS_TOKEN:
+            raise Http404
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(header, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponse(status=401)
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -18,6 +18,7 @@ from serializers.nomenclature import GPListSerializer, GPDetailSerializer, Patte
     PatternSerializer, ProductListSerializer, CombinationSerializer, EquipmentImageCRUDSerializer, \
     EquipmentListSerializer, EquipmentServiceSerializer, EquipmentServiceReadSerializer, EquipmentCRUDSerializer, \
     OperationRetrieveSerializer, FilesCRUDSerializer, FileSerializer
+from utils.media import convert_images_later
 from django_filters import rest_framework as filters
 
 
@@ -160,7 +161,8 @@ class PatternCRUDView(APIView):
         delete_ids = serializer.validated_data.get('delete_ids', [])
 
         create_data = [Pattern(nomenclature_id=product_id, image=image) for image in images]
-        Pattern.objects.bulk_create(create_data)
+        patterns = Pattern.objects.bulk_create(create_data)
+        convert_images_later(patterns)
 
         if delete_ids:
             Pattern.objects.filter(id__in=delete_ids).delete()
@@ -263,7 +265,8 @@ class EquipmentImageCRUDView(APIView):
         delete_ids = serializer.validated_data.get('delete_ids', [])
 
         create_data = [EquipmentImages(equipment_id=equipment_id, image=image) for image in images]
-        EquipmentImages.objects.bulk_create(create_data)
+        equipment_images = EquipmentImages.objects.bulk_create(create_data)
+        convert_images_later(equipment_images)
 
         if delete_ids:
             EquipmentImages.objects.filter(id__in=delete_ids).delete()
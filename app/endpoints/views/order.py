@@ -10,6 +10,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from endpoints.async_views import AsyncAPIView
 from endpoints.pagination import StandardPagination
 from endpoints.permissions import IsDirectorAndTechnologist, ClientIsOwner
 from my_db.models import Order, NomCount
@@ -34,7 +35,7 @@ class OrderFilter(filters.FilterSet):
 
 class OrderReadView(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
-    queryset = Order.objects.all()
+    queryset = Order.objects.select_related('client')
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = OrderFilter
     pagination_class = StandardPagination
@@ -46,9 +47,20 @@ class OrderReadView(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         if self.action == 'retrieve':
-            return Order.objects.all().prefetch_related('parties__details__size', 'parties__details__color',
-                                                        'products__amounts__size', 'products__amounts__color')
-        return Order.objects.all()
+            return Order.objects.select_related('client', 'in_warehouse', 'out_warehouse').prefetch_related(
+                'parties__details__size', 'parties__details__color', 'parties__staff',
+                'parties__consumptions__nomenclature__color',
+                'products__nomenclature__operations', 'products__amounts__size', 'products__amounts__color',
+            )
+        return Order.objects.select_related('client')
+
+
+class AsyncOrderListView(AsyncAPIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    async def get(self, request):
+        queryset = OrderFilter(request.GET, queryset=Order.objects.select_related('client')).qs
+        return await self.paginate(request, queryset, OrderListSerializer)
 
 
 class OrderModelViewSet(mixins.CreateModelMixin,
@@ -223,4 +235,8 @@ class ClientOrdersView(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         client = self.request.user.client_profile
+        if self.action == 'retrieve':
+            return Order.objects.filter(client=client).prefetch_related(
+                'parties__details', 'products__nomenclature', 'products__amounts__size', 'products__amounts__color',
+            )
         return Order.objects.filter(client=client)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import datetime
 
-from django.db.models import Sum, DecimalField, Subquery, OuterRef
+from django.db.models import Sum
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
@@ -13,9 +13,12 @@ from rest_framework.views import APIView
 from endpoints.pagination import StandardPagination
 from endpoints.permissions import IsDirectorAndTechnologist, IsStaff, IsOwner
 from my_db.enums import PaymentStatus, WorkStatus
-from my_db.models import Payment, WorkDetail, PaymentFile, Combination
+from main_conf.celery import app
+from my_db.models import Payment, WorkDetail, PaymentFile
 from serializers.payments import WorkPaymentSerializer, SalaryInfoSerializer, WorkPaymentFileCRUDSerializer, \
-    SalaryCreateSerializer, WorkPaymentDetailSerializer
+    SalaryCreateSerializer, WorkPaymentDetailSerializer, SalaryBatchSerializer, SalaryBatchStatusSerializer
+from tasks.payment import salary_batch
+from utils.payment import close_salary_period
 
 
 class PaymentCreateView(CreateAPIView):
@@ -51,12 +54,6 @@ class SalaryInfoView(APIView):
         responses=SalaryInfoSerializer(),
     )
     def get(self, request, pk):
-        operation_price_subquery = Combination.objects.filter(
-            id=OuterRef('combination_id')
-        ).annotate(
-            total_price=Sum('operations__price')
-        ).values('total_price')[:1]
-
         works_queryset = (
             WorkDetail.objects.filter(
                 staff_id=pk,
@@ -65,12 +62,12 @@ class SalaryInfoView(APIView):
             .values(
                 'combination_id',
                 'combination__title',
+                'combination__total_price',
                 'work__party__number',
                 'work__party__order_id',
             )
             .annotate(
                 total_amount=Sum('amount'),
-                price=Subquery(operation_price_subquery, output_field=DecimalField()),
             )
         )
 
@@ -79,7 +76,7 @@ class SalaryInfoView(APIView):
                 "operation": {
                     "id": work["combination_id"],
                     "title": work["combination__title"],
-                    "price": work["price"],
+                    "price": work["combination__total_price"],
                 },
                 "total_amount": work["total_amount"],
                 "party_number": work["work__party__number"],
@@ -142,42 +139,56 @@ class SalaryCreateView(APIView):
         serializer = SalaryCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         staff = serializer.validated_data.get('staff_id')
-        payment = Payment.objects.create(
-            staff=staff,
-            status=PaymentStatus.SALARY,
-            amount=serializer.validated_data.get('amount'),
+        close_salary_period(
+            {staff.id: serializer.validated_data.get('amount')},
             date_from=serializer.validated_data.get('date_from'),
-            date_until=serializer.validated_data.get('date_from'),
+            date_until=serializer.validated_data.get('date_until'),
         )
 
-        WorkDetail.objects.filter(
-            staff=staff,
-            status=WorkStatus.NEW,
-        ).update(status=WorkStatus.PAID, payment=payment)
+        return Response('Success!', status=status.HTTP_200_OK)
 
-        payments = Payment.objects.filter(
-            staff=staff,
-            status__in=[PaymentStatus.FINE, PaymentStatus.ADVANCE]
+
+class SalaryBatchView(APIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
+
+    @extend_schema(
+        request=SalaryBatchSerializer(),
+        responses={202: {'type': 'object', 'properties': {'task_id': {'type': 'string'}}}}
+    )
+    def post(self, request):
+        serializer = SalaryBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        task = salary_batch.delay(
+            serializer.validated_data['date_from'].isoformat(),
+            serializer.validated_data['date_until'].isoformat(),
+            serializer.validated_data.get('staff_ids'),
         )
+        return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
 
-        if payments:
-            update_data = []
-            for p in payments:
-                if p.status == PaymentStatus.ADVANCE:
-                    p.status = PaymentStatus.ADVANCE_CHECKED
-                elif p.status == PaymentStatus.FINE:
-                    p.status = PaymentStatus.FINE_CHECKED
-                update_data.append(p)
 
-            Payment.objects.bulk_update(update_data, ['status'])
+class SalaryBatchStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsDirectorAndTechnologist]
 
-        return Response('Success!', status=status.HTTP_200_OK)
+    @extend_schema(responses=SalaryBatchStatusSerializer())
+    def get(self, request, task_id):
+        result = app.AsyncResult(task_id)
+        info = result.info
+        if isinstance(info, Exception):
+            info = {'error': str(info)}
+
+        serializer = SalaryBatchStatusSerializer({
+            'task_id': task_id,
+            'status': result.status,
+            'result': info,
+        })
+        return Response(serializer.data)
 
 
 
 class PaymentDetailView(RetrieveAPIView):
     permission_classes = [IsAuthenticated, ]
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.select_related('staff').prefetch_related('lines', 'files')
     serializer_class = WorkPaymentDetailSerializer
 
 
@@ -206,5 +217,5 @@ class MyPaymentHistoryListView(APIView):
 
 class MyPaymentDetailView(RetrieveAPIView):
     permission_classes = [IsAuthenticated, IsOwner]
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.select_related('staff').prefetch_related('lines', 'files')
     serializer_class = WorkPaymentDetailSerializer
\ No newline at end of file
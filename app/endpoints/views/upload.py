@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from endpoints.permissions import IsStaff, IsDirectorAndTechnologist
+from my_db.enums import UploadTarget, UploadStatus
+from my_db.models import ChunkedUpload
+from serializers.upload import ChunkedUploadInitSerializer, ChunkedUploadSerializer
+from utils.upload import write_chunk, attach_upload, discard_upload, sync_offset
+
+
+class ChunkedUploadView(APIView):
+    """
+    Загрузка больших файлов частями:
+    1. POST upload/ - создать загрузку, в ответе id и offset.
+    2. PUT upload/<id>/?offset=N - тело запроса (application/octet-stream) дописывается с позиции N.
+       При обрыве GET upload/<id>/ вернёт сохранённый offset, с него и продолжается загрузка.
+    3. POST upload/<id>/finalize/ - файл прикрепляется к товару, клиенту, оплате или браку.
+    Незавершённая загрузка без новых частей дольше CHUNKED_UPLOAD_EXPIRE_HOURS удаляется вместе с файлом.
+    """
+    permission_classes = [IsAuthenticated, IsStaff]
+
+    @extend_schema(request=ChunkedUploadInitSerializer(), responses={201: ChunkedUploadSerializer()})
+    def post(self, request):
+        serializer = ChunkedUploadInitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if (serializer.validated_data['target'] != UploadTarget.QUANTITY_FILE
+                and not IsDirectorAndTechnologist().has_permission(request, self)):
+            raise PermissionDenied()
+
+        upload = serializer.save(user=request.user)
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadDetailView(APIView):
+    permission_classes = [IsAuthenticated, IsStaff]
+
+    @extend_schema(responses=ChunkedUploadSerializer())
+    def get(self, request, pk):
+        upload = get_object_or_404(ChunkedUpload, id=pk, user=request.user)
+        if upload.status == UploadStatus.NEW:
+            sync_offset(upload)
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        parameters=[
+            OpenApiParameter(name="offset", description="Позиция части в файле (байт)", required=True, type=int),
+        ],
+        responses={200: ChunkedUploadSerializer(), 409: ChunkedUploadSerializer()}
+    )
+    def put(self, request, pk):
+        with transaction.atomic():
+            upload = get_object_or_404(ChunkedUpload.objects.select_for_update(), id=pk, user=request.user)
+            if upload.status != UploadStatus.NEW:
+                return Response({'error': 'Загрузка уже завершена!'}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                offset = int(request.query_params.get('offset', upload.offset))
+            except ValueError:
+                return Response({'error': 'offset должен быть целым числом!'}, status=status.HTTP_400_BAD_REQUEST)
+            if offset < 0:
+                return Response({'error': 'offset не может быть отрицательным!'}, status=status.HTTP_400_BAD_REQUEST)
+            if sync_offset(upload) or offset > upload.offset:
+                # часть пришла раньше предыдущей или на диске меньше, чем записано в offset (.part потерян) -
+                # клиент должен продолжить с сохранённой позиции
+                return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_409_CONFLICT)
+
+            # тело читается напрямую из потока запроса, без парсеров DRF и буферизации в памяти
+            upload.offset = write_chunk(upload, request._request, offset)
+            upload.save(update_fields=['offset', 'updated_at'])
+
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={204: None})
+    def delete(self, request, pk):
+        upload = get_object_or_404(ChunkedUpload, id=pk, user=request.user)
+        discard_upload(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ChunkedUploadFinalizeView(APIView):
+    permission_classes = [IsAuthenticated, IsStaff]
+
+    @extend_schema(request=None, responses=ChunkedUploadSerializer())
+    def post(self, request, pk):
+        with transaction.atomic():
+            upload = get_object_or_404(ChunkedUpload.objects.select_for_update(), id=pk, user=request.user)
+            if upload.status == UploadStatus.DONE:
+                return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+            sync_offset(upload)
+            if upload.offset != upload.size:
+                return Response({'error': f'Загружено {upload.offset} из {upload.size} байт!'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            upload.file_id = attach_upload(upload).id
+            upload.status = UploadStatus.DONE
+            upload.save(update_fields=['file_id', 'status', 'updated_at'])
+
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
@@ -5,23 +5,28 @@ from django.db.models.functions import Coalesce
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, status, mixins
 from rest_framework.exceptions import ValidationError
-from rest_framework.generics import ListAPIView
+from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters import rest_framework as filters
 from rest_framework.viewsets import GenericViewSet
 
+from endpoints.async_views import AsyncAPIView
 from endpoints.pagination import StandardPagination
 from endpoints.permissions import IsDirectorAndTechnologist, IsStaff
 from my_db.enums import NomType, QuantityStatus, StaffRole, NomStatus
 from my_db.models import Warehouse, Nomenclature, NomCount, Quantity, QuantityHistory, QuantityNomenclature, \
-    QuantityFile
+    QuantityFile, ImportJob
 from serializers.warehouse import WarehouseSerializer, WarehouseCRUDSerializer, MaterialSerializer, \
     MaterialCRUDSerializer, StockInputSerializer, StockOutputSerializer, StockDefectiveSerializer, \
     StockDefectiveFileSerializer, StockOutputUpdateSerializer, MovingSerializer, MovingListSerializer, \
     MyMaterialsSerializer, WarehouseListSerializer, QuantityHistoryListSerializer, QuantityHistoryDetailSerializer, \
-    CreateMaterialsSerializer
+    CreateMaterialsSerializer, MaterialImportSerializer, ImportJobSerializer
+from tasks.product import change_product_cost_price
+from tasks.warehouse import import_materials
+from utils.events import notify_quantity, notify_stock
+from utils.outbox import enqueue
 
 
 class WarehouseModelViewSet(viewsets.ModelViewSet):
@@ -172,6 +177,26 @@ class CreateMaterialsView(APIView):
 
 
 
+class MaterialImportView(APIView):
+    permission_classes = [IsAuthenticated, IsStaff]
+
+    @extend_schema(request=MaterialImportSerializer(), responses={202: ImportJobSerializer()})
+    def post(self, request):
+        serializer = MaterialImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job = ImportJob.objects.create(staff=request.user.staff_profile, file=serializer.validated_data['file'])
+        transaction.on_commit(lambda: import_materials.delay(job.id))
+
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class MaterialImportDetailView(RetrieveAPIView):
+    permission_classes = [IsAuthenticated, IsStaff]
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+
 class StockInputView(APIView):
     permission_classes = [IsAuthenticated, IsStaff]
 
@@ -232,6 +257,11 @@ class StockInputView(APIView):
 
             NomCount.objects.bulk_update(nom_count_updates, ['amount'])
             Nomenclature.objects.bulk_update(nomenclature_updates, ['cost_price'])
+            # новая средняя цена сырья -> себестоимость изделий с этим сырьём
+            enqueue(change_product_cost_price, sorted(n.id for n in nomenclature_updates))
+
+        notify_quantity(quantity)
+        notify_stock(quantity.in_warehouse_id, [item['product_id'] for item in data])
 
         return Response('Success!', status=status.HTTP_200_OK)
 
@@ -267,6 +297,7 @@ class StockOutputView(APIView):
 
         QuantityHistory.objects.create(quantity=quantity, staff_id=staff.id, staff_name=staff.name,
                                        staff_surname=staff.surname, status=quantity.status)
+        notify_quantity(quantity)
 
         return Response('Success!', status=status.HTTP_200_OK)
 
@@ -334,6 +365,7 @@ class StockDefectiveView(APIView):
                     warehouse=warehouse,
                     nomenclature_id=i["product_id"]
                 ).update(amount=F('amount') - i["amount"])
+        notify_stock(quantity.out_warehouse_id, [i['product_id'] for i in data['products']])
 
         return Response({"quantity_id": quantity.id}, status=status.HTTP_200_OK)
 
@@ -411,6 +443,12 @@ class StockOutputUpdateView(APIView):
                     nomenclature_updates.append(nomenclature)
                 NomCount.objects.bulk_update(nom_count_updates, ['amount'])
                 Nomenclature.objects.bulk_update(nomenclature_updates, ['cost_price'])
+                enqueue(change_product_cost_price, sorted(n.id for n in nomenclature_updates))
+
+            nomenclature_ids = [update.nomenclature_id for update in updates]
+            notify_stock(quantity.out_warehouse_id, nomenclature_ids)
+            notify_stock(quantity.in_warehouse_id, nomenclature_ids)
+        notify_quantity(quantity)
 
         return Response('Success!', status=status.HTTP_200_OK)
 
@@ -451,8 +489,14 @@ class QuantityHistoryListView(viewsets.ReadOnlyModelViewSet):
                 ).order_by('-id')
 
 
+class AsyncQuantityHistoryListView(AsyncAPIView):
+    permission_classes = [IsAuthenticated, IsStaff]
 
-
-
-
-
+    async def get(self, request):
+        warehouse = await Warehouse.objects.filter(staffs__user=request.user).afirst()
+        queryset = QuantityHistory.objects.filter(
+                Q(quantity__out_warehouse=warehouse) | Q(quantity__in_warehouse=warehouse)
+                ).select_related(
+                    'quantity', 'quantity__in_warehouse', 'quantity__out_warehouse'
+                ).order_by('-id')
+        return await self.paginate(request, queryset, QuantityHistoryListSerializer)
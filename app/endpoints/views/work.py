@@ -84,7 +84,9 @@ class MyWorkListView(APIView):
 
 class OrderInfoListView(ListAPIView):
     permission_classes = [IsAuthenticated, IsStaff]
-    queryset = Order.objects.filter(status=OrderStatus.PROGRESS).prefetch_related('products__nomenclature')
+    # просроченные заказы тоже в производстве - по ним продолжают создавать партии
+    queryset = Order.objects.filter(status__in=[OrderStatus.PROGRESS, OrderStatus.OVERDUE]) \
+        .prefetch_related('products__nomenclature')
     serializer_class = OrderSerializer
 
 
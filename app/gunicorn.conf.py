@@ -0,0 +1,11 @@
+import decouple
+
+# WEB_ASGI=True - uvicorn-воркеры и main_conf.asgi: async-представления (api/v1/async/...) и медленные
+# загрузки не занимают воркер целиком. По умолчанию - прежний режим: sync-воркеры и main_conf.wsgi.
+# Имя config в этом файле занято самим gunicorn, поэтому decouple импортируется модулем.
+asgi = decouple.config('WEB_ASGI', default=False, cast=bool)
+
+wsgi_app = 'main_conf.asgi:application' if asgi else 'main_conf.wsgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker' if asgi else 'sync'
+workers = decouple.config('WEB_WORKERS', default=1, cast=int)
+bind = '0.0.0.0:8000'
@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main_conf.settings')
 
-application = get_asgi_application()
+# приложение Django создаётся до импорта consumers - им нужны загруженные модели
+django_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from endpoints.consumers import JWTQueryAuthMiddleware  # noqa: E402
+from endpoints.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_application,
+    'websocket': JWTQueryAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
@@ -1,6 +1,7 @@
 import os
 from django.conf import settings
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main_conf.settings')
 
@@ -8,7 +9,62 @@ app = Celery('main_conf')
 app.config_from_object('django.conf:settings')
 
 app.autodiscover_tasks()
+# задачи лежат в пакете tasks, а не в приложениях - autodiscover их не находит
+app.conf.imports = ('tasks.base', 'tasks.equipment', 'tasks.media', 'tasks.order', 'tasks.outbox', 'tasks.payment', 'tasks.product',
+                    'tasks.warehouse')
 
 
 app.conf.timezone = settings.TIME_ZONE
 app.conf.update(result_extended=True)
+
+# Очереди: stock - быстрые списания со склада (цех раскроя), reporting - тяжёлые закрытия заказов,
+# зарплаты и импорт, media - конвертация изображений, default - остальное.
+# Каждую очередь слушает свой воркер (docker-compose), тяжёлые не задерживают быстрые.
+app.conf.task_default_queue = 'default'
+app.conf.task_routes = {
+    'tasks.warehouse.write_off_from_warehouse': {'queue': 'stock'},
+    'tasks.warehouse.import_materials': {'queue': 'reporting'},
+    'tasks.equipment.*': {'queue': 'reporting'},
+    'tasks.product.*': {'queue': 'reporting'},
+    'tasks.order.mark_overdue_orders': {'queue': 'default'},
+    'tasks.order.*': {'queue': 'reporting'},
+    'tasks.payment.*': {'queue': 'reporting'},
+    'tasks.media.*': {'queue': 'media'},
+}
+# воркер берёт из брокера по одной задаче на процесс, длинная задача не держит в резерве чужие;
+# для очереди stock увеличивается в docker-compose (--prefetch-multiplier)
+app.conf.worker_prefetch_multiplier = 1
+# acks_late задачам (tasks/base.py) нужно, чтобы Redis не передоставил задачу, которая ещё выполняется:
+# visibility_timeout должен быть больше самой долгой задачи
+app.conf.broker_transport_options = {'visibility_timeout': 3 * 3600}
+
+app.conf.beat_schedule = {
+    'relay-outbox': {
+        'task': 'tasks.outbox.relay_outbox',
+        'schedule': 60,
+    },
+    'mark-overdue-orders': {
+        'task': 'tasks.order.mark_overdue_orders',
+        'schedule': 5 * 60,
+    },
+    'recalculate-product-costs': {
+        'task': 'tasks.product.change_product_cost_price',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'refresh-equipment-usage': {
+        'task': 'tasks.equipment.refresh_equipment_usage_task',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'cleanup-orphan-media': {
+        'task': 'tasks.media.cleanup_orphan_media',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'cleanup-stale-uploads': {
+        'task': 'tasks.media.cleanup_stale_uploads',
+        'schedule': crontab(hour=3, minute=45),
+    },
+    'purge-task-keys': {
+        'task': 'tasks.base.purge_task_keys',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
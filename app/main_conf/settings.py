@@ -52,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'endpoints.middleware.RequestMetricsMiddleware',
+    'endpoints.middleware.RequestRecorderMiddleware',
+    'endpoints.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -88,11 +91,15 @@ SPECTACULAR_SETTINGS = {
 }
 
 WSGI_APPLICATION = 'main_conf.wsgi.application'
+ASGI_APPLICATION = 'main_conf.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# тот же флаг, что в gunicorn.conf.py: под ASGI постоянные соединения по умолчанию выключены (см. ниже)
+WEB_ASGI = config('WEB_ASGI', default=False, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -100,10 +107,32 @@ DATABASES = {
         'USER': config('POSTGRES_USER'),
         'PASSWORD': config('POSTGRES_PASSWORD'),
         'HOST': config('POSTGRES_HOST'),
-        'PORT': config('POSTGRES_PORT', cast=int)
+        'PORT': config('POSTGRES_PORT', cast=int),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0 if WEB_ASGI else 60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_PGBOUNCER', default=False, cast=bool),
     }
 }
 
+# Переиспользование соединений с Postgres.
+# DB_CONN_MAX_AGE - сколько секунд держать соединение между запросами/задачами (0 - закрывать каждый раз),
+# по умолчанию 60, при WEB_ASGI=True - 0.
+# DB_CONN_HEALTH_CHECKS - проверять соединение перед повторным использованием, чтобы перезапуск Postgres
+# не ронял первый запрос.
+# DB_PGBOUNCER=True - подключение идёт через pgbouncer (сервис pgbouncer в docker-compose, transaction
+# pooling): POSTGRES_HOST/PORT указывают на него, серверные курсоры отключены - с ними transaction pooling
+# ломает .iterator() (экспорт CSV, подсчёт ссылок на медиа), он будет читать результат целиком.
+#
+# Безопасные значения по типу процесса:
+# - gunicorn sync (WEB_ASGI=False): DB_CONN_MAX_AGE=60 - одно соединение на воркер, держится между запросами;
+#   всего соединений = WEB_WORKERS.
+# - gunicorn + uvicorn (WEB_ASGI=True): DB_CONN_MAX_AGE=0, для пула - pgbouncer. Документация Django
+#   требует отключать постоянные соединения в async-режиме: соединения привязаны к потокам sync_to_async.
+# - celery worker: DB_CONN_MAX_AGE=300 - Celery закрывает устаревшие соединения до и после каждой задачи
+#   с учётом CONN_MAX_AGE; соединений = concurrency воркера.
+# - celery beat (сервис celery-beat): в БД не ходит.
+# Сумма по всем процессам должна быть меньше max_connections Postgres (по умолчанию 100), иначе - pgbouncer.
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -143,6 +172,73 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media-files/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загруженные файлы именуются хэшем содержимого, дубликаты хранятся один раз
+MEDIA_CONTENT_ADDRESSED = config('MEDIA_CONTENT_ADDRESSED', default=True, cast=bool)
+# Неиспользуемые файлы моложе этого срока не удаляются: запись о них могла ещё не сохраниться
+MEDIA_ORPHAN_GRACE_HOURS = config('MEDIA_ORPHAN_GRACE_HOURS', default=24, cast=int)
+# Загрузка частями: недокачанные файлы лежат вне MEDIA_ROOT, чтобы nginx их не раздавал. Каталог - общий том
+# web и celery-media (docker-compose: chunked_uploads_volume), там же работает очистка cleanup_stale_uploads
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=os.path.join(BASE_DIR, 'chunked_uploads'))
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=2 * 1024 ** 3, cast=int)
+# Недокачанные загрузки без новых частей дольше этого срока удаляются (tasks.media.cleanup_stale_uploads)
+CHUNKED_UPLOAD_EXPIRE_HOURS = config('CHUNKED_UPLOAD_EXPIRE_HOURS', default=48, cast=int)
+STORAGES = {
+    'default': {
+        'BACKEND': 'my_db.storage.ContentAddressedStorage' if MEDIA_CONTENT_ADDRESSED
+        else 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Изображения WEBPField: при WEBP_ASYNC оригинал сохраняется сразу, конвертация и миниатюры - в Celery
+WEBP_ASYNC = config('WEBP_ASYNC', default=True, cast=bool)
+WEBP_THUMBNAIL_SIZES = (160, 480, 1200)
+# Ограничения декодирования: больше WEBP_MAX_PIXELS - отказ, больше WEBP_MAX_DIMENSION по стороне - уменьшение
+WEBP_MAX_PIXELS = config('WEBP_MAX_PIXELS', default=60_000_000, cast=int)
+WEBP_MAX_DIMENSION = config('WEBP_MAX_DIMENSION', default=2560, cast=int)
+WEBP_QUALITY = config('WEBP_QUALITY', default=80, cast=int)
+
+# Метрики запросов (endpoints/middleware.py): Server-Timing в каждом ответе, /metrics/ для Prometheus.
+# Без METRICS_TOKEN /metrics/ отдаёт 404.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Максимум SQL-запросов на эндпоинт (view_name: число или {метод: число}). Превышение пишется в лог,
+# при QUERY_BUDGET_STRICT - исключение QueryBudgetExceeded (для тестов и CI).
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=None, cast=lambda v: int(v) if v else None)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+# Замер benchmark_api (generate_dataset --scale 1): order-list 4 запроса, order-detail 18 при любом размере
+# заказа. Рост числа запросов с данными - N+1, бюджет должен его ловить.
+QUERY_BUDGETS = {
+    'order-list': 25,
+    'order-detail': 30,
+    'endpoints.views.dashboard.StatisticView': 15,
+}
+
+# Запись API-запросов в JSONL для replay_requests (endpoints/middleware.py). Пустой путь - запись выключена.
+# Под ASGI включённая запись переводит async-представления в поток, поэтому включать на время сбора нагрузки.
+REQUEST_LOG_PATH = config('REQUEST_LOG_PATH', default='')
+REQUEST_LOG_SAMPLE_RATE = config('REQUEST_LOG_SAMPLE_RATE', default=1.0, cast=float)
+REQUEST_LOG_MAX_BODY = config('REQUEST_LOG_MAX_BODY', default=64 * 1024, cast=int)
+
+# Профили медленных запросов (endpoints/middleware.py, команда profiles). Пустой PROFILE_DIR - выключено.
+# Сэмплирование стека идёт из отдельного потока и почти не влияет на запрос; cProfile - только для малой доли.
+PROFILE_DIR = config('PROFILE_DIR', default='')
+PROFILE_SLOW_MS = config('PROFILE_SLOW_MS', default=1000, cast=int)
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_CPROFILE_RATE = config('PROFILE_CPROFILE_RATE', default=0.0, cast=float)
+PROFILE_INTERVAL_MS = config('PROFILE_INTERVAL_MS', default=5, cast=int)
+PROFILE_MAX_FILES = config('PROFILE_MAX_FILES', default=500, cast=int)
+
+# Планирование загрузки (utils/scheduler.py): рабочий день, рабочие дни недели (пн..вс) и доля полезного времени
+SCHEDULE_WORKDAY_START = config('SCHEDULE_WORKDAY_START', default=9, cast=int)
+SCHEDULE_WORKDAY_HOURS = config('SCHEDULE_WORKDAY_HOURS', default=8, cast=int)
+SCHEDULE_WEEKMASK = config('SCHEDULE_WEEKMASK', default='1111110')
+SCHEDULE_EFFICIENCY = config('SCHEDULE_EFFICIENCY', default=0.85, cast=float)
+
+# Пересчёт калькуляции (utils/calculation.py): сколько секунд кэшируются цены материалов и надбавки разрядов
+CALCULATION_PRICE_CACHE_SECONDS = config('CALCULATION_PRICE_CACHE_SECONDS', default=60, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -200,3 +296,12 @@ REDIS_URL = f'redis://default:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/'
 BROKER_URL = REDIS_URL + '0'
 CELERY_RESULT_BACKEND = BROKER_URL
 
+# WebSocket-события (utils/events.py, endpoints/consumers.py). Работают только в ASGI-режиме (WEB_ASGI=True),
+# отправлять события могут и sync-воркеры, и Celery.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [REDIS_URL + '1']},
+    },
+}
+
@@ -192,9 +192,14 @@ class PaymentFileInline(NestedStackedInline):
     extra = 0
 
 
+class PaymentLineInline(NestedStackedInline):
+    model = PaymentLine
+    extra = 0
+
+
 @admin.register(Payment)
 class PaymentAdmin(NestedModelAdmin):
-    inlines = (PaymentFileInline,)
+    inlines = (PaymentFileInline, PaymentLineInline)
     list_display = ("id", "staff", "status", "created_at")
     list_display_links = ("id", "staff", "status", "created_at")
 
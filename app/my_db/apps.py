@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MyDbConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'my_db'
+
+    def ready(self):
+        from . import signals  # noqa: F401
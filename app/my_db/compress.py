@@ -1,24 +1,129 @@
 import io
+import os
 import uuid
 
-from PIL import Image
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.db import models
 from django.db.models.fields.files import ImageFieldFile
 
+PENDING_PREFIX = 'pending/'
+
+# защита от "декомпрессионных бомб": Pillow откажется открывать картинки сильно больше лимита
+Image.MAX_IMAGE_PIXELS = settings.WEBP_MAX_PIXELS
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def check_image_size(image):
+    width, height = image.size
+    if width * height > settings.WEBP_MAX_PIXELS:
+        raise ImageTooLarge(
+            f'Изображение {width}x{height} больше допустимых {settings.WEBP_MAX_PIXELS} пикселей.'
+        )
+
+
+def load_image(source):
+    """
+    Открывает изображение с ограничением по памяти: размер проверяется по заголовку,
+    JPEG уменьшается ещё при декодировании (draft), остальное - сразу после него.
+    """
+    image = Image.open(source)
+    check_image_size(image)
+
+    max_dimension = settings.WEBP_MAX_DIMENSION
+    image.draft('RGB', (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension))
+    return image
+
+
+def encode_webp(image):
+    image_bytes = io.BytesIO()
+    # exif не передаётся - метаданные (в т.ч. геолокация) в итоговый файл не попадают
+    image.save(fp=image_bytes, format="WEBP", quality=settings.WEBP_QUALITY, exif=b'')
+    return image_bytes.getvalue()
+
+
+def is_pending(name):
+    return bool(name) and name.startswith(PENDING_PREFIX)
+
+
+def webp_name(name):
+    if is_pending(name):
+        name = name[len(PENDING_PREFIX):]
+    return '{}.webp'.format(os.path.splitext(name)[0])
+
+
+def thumbnail_name(name, size):
+    return '{}_{}.webp'.format(os.path.splitext(name)[0], size)
+
+
+def save_webp_variants(storage, source, name):
+    """Сохраняет source в WEBP под именем name вместе с уменьшенными копиями. Возвращает итоговое имя."""
+    image = load_image(source)
+    name = storage.save(name, ContentFile(encode_webp(image)))
+
+    # от большей копии к меньшей: каждая следующая уменьшается из предыдущей, а не из оригинала
+    thumbnail = image
+    for size in sorted(settings.WEBP_THUMBNAIL_SIZES, reverse=True):
+        thumbnail = thumbnail.copy()
+        thumbnail.thumbnail((size, size))
+        variant = thumbnail_name(name, size)
+        if hasattr(storage, 'save_derived'):
+            storage.save_derived(variant, ContentFile(encode_webp(thumbnail)))
+            continue
+        if storage.exists(variant):
+            storage.delete(variant)
+        storage.save(variant, ContentFile(encode_webp(thumbnail)))
+
+    return name
+
 
 class WEBPFieldFile(ImageFieldFile):
     def save(self, name, content, save=True):
         content.file.seek(0)
-        image = Image.open(content.file)
-        image_bytes = io.BytesIO()
-        image.save(fp=image_bytes, format="WEBP")
-        image_content_file = ContentFile(content=image_bytes.getvalue())
-        super().save(name, image_content_file, save)
+        generated_name = self.field.generate_filename(self.instance, name)
+
+        if settings.WEBP_ASYNC:
+            # оригинал сохраняется как есть, в WEBP его переводит tasks.media.convert_to_webp
+            extension = os.path.splitext(name)[1].lower()
+            pending_name = PENDING_PREFIX + os.path.splitext(generated_name)[0] + extension
+            self.name = self.storage.save(pending_name, content, max_length=self.field.max_length)
+        else:
+            self.name = save_webp_variants(self.storage, content.file, generated_name)
+
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def thumbnail_urls(self):
+        if not self.name or is_pending(self.name):
+            return {}
+        return {size: self.storage.url(thumbnail_name(self.name, size)) for size in settings.WEBP_THUMBNAIL_SIZES}
+
+
+def validate_image_size(value):
+    """Проверяет размер по заголовку файла, не декодируя изображение целиком."""
+    try:
+        position = value.tell()
+        check_image_size(Image.open(value))
+        value.seek(position)
+    except (ImageTooLarge, Image.DecompressionBombError) as e:
+        raise ValidationError(str(e))
 
 
 class WEBPField(models.ImageField):
     attr_class = WEBPFieldFile
+    default_validators = models.ImageField.default_validators + [validate_image_size]
 
 
 def staff_image_folder(instance, filename):
@@ -34,4 +139,4 @@ def equipment_image_folder(instance, filename):
 
 
 def nom_image_folder(instance, filename):
-    return 'nomenclatures/{}.webp'.format(uuid.uuid4().hex)
\ No newline at end of file
+    return 'nomenclatures/{}.webp'.format(uuid.uuid4().hex)
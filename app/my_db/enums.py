@@ -85,3 +85,21 @@ class CombinationStatus(models.IntegerChoices):
     DONE = 2, "УПАКОВКА"
     CUT = 3, 'КРОЙ'
 
+
+class ImportStatus(models.IntegerChoices):
+    NEW = 1, "НОВЫЙ"
+    PROGRESS = 2, "В ПРОЦЕССЕ"
+    DONE = 3, "ГОТОВО"
+    FAILED = 4, "ОШИБКА"
+
+
+class UploadTarget(models.IntegerChoices):
+    NOM_FILE = 1, "ФАЙЛ ТОВАРА"
+    CLIENT_FILE = 2, "ФАЙЛ КЛИЕНТА"
+    PAYMENT_FILE = 3, "ФАЙЛ ОПЛАТЫ"
+    QUANTITY_FILE = 4, "ФАЙЛ БРАКА"
+
+
+class UploadStatus(models.IntegerChoices):
+    NEW = 1, "ЗАГРУЖАЕТСЯ"
+    DONE = 2, "ЗАВЕРШЕН"
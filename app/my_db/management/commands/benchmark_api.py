@@ -0,0 +1,154 @@
+import json
+import statistics
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_db.enums import NomType, QuantityStatus, StaffRole
+from my_db.models import MyUser, Order, Nomenclature, Quantity, StaffProfile
+from utils.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = ('Замеряет ключевые эндпоинты на данных generate_dataset: задержки p50/p95 и число SQL-запросов. '
+            'Запросы идут в процессе через тестовый Client, изменяющие - в транзакции с откатом.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Префикс, с которым запускался generate_dataset.')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--scenario', action='append', default=[], help='Только указанные сценарии.')
+        parser.add_argument('--output', help='Сохранить результат в JSON (базовая линия).')
+        parser.add_argument('--compare', help='JSON прошлого прогона: показать изменение p50/p95 и запросов.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        director = MyUser.objects.filter(username=f'{prefix}_director_0').first()
+        manager = StaffProfile.objects.filter(user__username=f'{prefix}_warehouse_0').first()
+        if not director or not manager:
+            raise CommandError(f'Нет данных с префиксом {prefix}, сначала выполните generate_dataset.')
+
+        scenarios = self.build_scenarios(prefix, manager)
+        if options['scenario']:
+            scenarios = [scenario for scenario in scenarios if scenario[0] in options['scenario']]
+        clients = {'director': self.client_for(director), 'manager': self.client_for(manager.user)}
+
+        results = {}
+        for name, role, write, requests in scenarios:
+            if not requests:
+                self.stdout.write(self.style.WARNING(f'{name}: нет данных для запросов, пропущен'))
+                continue
+            results[name] = self.run(clients[role], requests, write, options['warmup'], options['iterations'])
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)['results']
+        self.print_report(results, baseline)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({'vendor': connection.vendor, 'created_at': timezone.now().isoformat(),
+                           'iterations': options['iterations'], 'results': results}, file, indent=2)
+
+    def client_for(self, user):
+        return Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def build_scenarios(self, prefix, manager):
+        """Сценарии: (название, роль, изменяет ли данные, [(метод, путь, тело), ...] - запросы идут по кругу)."""
+        warehouse = manager.warehouses.first()
+        orders = Order.objects.filter(client__user__username__startswith=f'{prefix}_', products__isnull=False)
+        order_ids = list(orders.distinct().values_list('id', flat=True)[:20])
+        material_ids = list(Nomenclature.objects.filter(vendor_code__startswith=f'{prefix}-M', type=NomType.MATERIAL)
+                            .values_list('id', flat=True)[:50])
+        other_warehouse = Quantity.objects.filter(out_warehouse=warehouse).exclude(in_warehouse=warehouse) \
+            .values_list('in_warehouse_id', flat=True).first()
+        incoming_ids = list(Quantity.objects.filter(in_warehouse=warehouse, status=QuantityStatus.PROGRESSING)
+                            .values_list('id', flat=True)[:20])
+        seamstress_ids = list(StaffProfile.objects.filter(user__username__startswith=f'{prefix}_',
+                                                          role=StaffRole.SEAMSTRESS).values_list('id', flat=True))
+
+        def products(i, price=True):
+            items = [{'product_id': material_ids[(i + k) % len(material_ids)], 'amount': 10} for k in range(5)]
+            if price:
+                for item in items:
+                    item['price'] = 100
+            return items
+
+        date = timezone.localdate().strftime('%d-%m-%Y')
+        return [
+            ('order_detail', 'director', False, [('get', f'/api/v1/order/list/{pk}/', None) for pk in order_ids]),
+            ('order_list', 'director', False, [('get', '/api/v1/order/list/', None)]),
+            ('stock_input', 'manager', True, [('post', '/api/v1/warehouse/input/', products(i)) for i in range(10)]),
+            ('transfer_out', 'manager', True, [
+                ('post', '/api/v1/warehouse/output/', {'output_warehouse_id': other_warehouse,
+                                                       'status': QuantityStatus.PROGRESSING,
+                                                       'products': products(i, price=False)})
+                for i in range(10)
+            ]),
+            ('transfer_accept', 'manager', True, [
+                ('post', '/api/v1/warehouse/output/update/', {'quantity_id': pk, 'status': QuantityStatus.ACTIVE})
+                for pk in incoming_ids
+            ]),
+            ('movements', 'manager', False, [('get', '/api/v1/warehouse/movements/', None)]),
+            ('salary_info', 'director', False, [
+                ('get', f'/api/v1/payment/salary-info/{pk}/', None) for pk in seamstress_ids
+            ]),
+            ('statistic', 'director', False, [('get', f'/api/v1/dashboard/statistic/?date={date}', None)]),
+            ('history', 'director', False, [('get', '/api/v1/warehouse/history/list/', None)]),
+        ]
+
+    def run(self, client, requests, write, warmup, iterations):
+        latencies, queries, errors = [], [], 0
+        for i in range(warmup + iterations):
+            method, path, data = requests[i % len(requests)]
+            with transaction.atomic() if write else nullcontext(), CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                if method == 'get':
+                    response = client.get(path)
+                else:
+                    response = client.post(path, data, content_type='application/json')
+                elapsed = time.perf_counter() - start
+                if write:
+                    transaction.set_rollback(True)
+
+            if i < warmup:
+                continue
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            queries.append(len(captured))
+
+        return {
+            'requests': len(latencies) + errors,
+            'errors': errors,
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'max': round(max(latencies, default=0) * 1000, 1),
+            'queries': int(statistics.median(queries)) if queries else 0,
+            'max_queries': max(queries, default=0),
+        }
+
+    def print_report(self, results, baseline):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'БД: {connection.vendor}'))
+        self.stdout.write(f'{"scenario":<18}{"req":>6}{"err":>6}{"p50":>9}{"p95":>9}{"max":>9}{"sql":>6}{"sql max":>9}')
+        for name, row in results.items():
+            line = (f'{name:<18}{row["requests"]:>6}{row["errors"]:>6}{row["p50"]:>9}{row["p95"]:>9}{row["max"]:>9}'
+                    f'{row["queries"]:>6}{row["max_queries"]:>9}')
+            if name in baseline:
+                before = baseline[name]
+                line += (f'   p50 {self.delta(before["p50"], row["p50"])}  p95 {self.delta(before["p95"], row["p95"])}'
+                         f'  sql {row["queries"] - before["queries"]:+d}')
+            self.stdout.write(line)
+
+    def delta(self, before, after):
+        if not before:
+            return '   -'
+        return f'{(after - before) / before * 100:+.0f}%'
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, close_old_connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_db.models import MyUser
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает запросы в секунду с новым соединением на каждый запрос и с постоянным соединением.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Пользователь, от имени которого идут запросы.')
+        parser.add_argument('--path', default='/api/v1/order/list/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--host', help='Другой HOST для второго прогона, например pgbouncer.')
+        parser.add_argument('--port', help='PORT для --host.')
+
+    def handle(self, *args, **options):
+        user = MyUser.objects.filter(username=options['username']).first()
+        if not user:
+            raise CommandError('Пользователь не найден.')
+        token = RefreshToken.for_user(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        runs = [('без переиспользования (CONN_MAX_AGE=0)', 0, {}), ('постоянное соединение', 600, {})]
+        if options['host']:
+            runs.append(('пул: ' + options['host'], 0, {'HOST': options['host'], 'PORT': options['port']}))
+
+        original = connection.settings_dict.copy()
+        try:
+            for title, max_age, overrides in runs:
+                connection.close()
+                connection.settings_dict.update(original, CONN_MAX_AGE=max_age, **overrides)
+                self.run(title, client, options['path'], options['requests'])
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+    def run(self, title, client, path, requests):
+        # тестовый Client не закрывает соединения сам, поэтому здесь повторяется то,
+        # что делает обработчик gunicorn на request_started/request_finished
+        start = time.perf_counter()
+        for _ in range(requests):
+            close_old_connections()
+            response = client.get(path)
+            close_old_connections()
+            if response.status_code >= 400:
+                raise CommandError(f'{path}: {response.status_code}')
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'{title:<45}{requests / elapsed:>10.1f} запр/с{elapsed / requests * 1000:>10.2f} мс')
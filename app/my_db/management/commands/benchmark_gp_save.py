@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_db.enums import NomType, CombinationStatus
+from my_db.models import MyUser, Nomenclature, Equipment, Rank
+
+
+class Command(BaseCommand):
+    help = ('Число SQL-запросов и время сохранения ГП (product/crud) для техкарт разного размера: создание, '
+            'повторное сохранение без изменений и сохранение с изменениями. Всё в транзакции с откатом.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Префикс, с которым запускался generate_dataset.')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[5, 20, 40, 80], help='Число комбинаций.')
+        parser.add_argument('--operations', type=int, default=5, help='Операций в комбинации.')
+        parser.add_argument('--consumables', type=int, default=10)
+
+    def handle(self, *args, **options):
+        director = MyUser.objects.filter(username=f'{options["prefix"]}_director_0').first()
+        if not director:
+            raise CommandError(f'Нет данных с префиксом {options["prefix"]}, сначала выполните generate_dataset.')
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(director).access_token}')
+
+        self.materials = list(Nomenclature.objects.filter(type=NomType.MATERIAL).values_list('id', flat=True)[:50])
+        self.equipment = list(Equipment.objects.values_list('id', flat=True)[:10]) or [None]
+        self.ranks = list(Rank.objects.values_list('id', flat=True)) or [None]
+
+        self.stdout.write(f'{"combinations":>13}{"operations":>12}  {"create":>14}{"resave":>14}{"change":>14}')
+        for size in options['sizes']:
+            with transaction.atomic():
+                payload = self.payload(size, options['operations'], options['consumables'])
+                create, response = self.measure(lambda: client.post('/api/v1/product/crud/', payload,
+                                                                    content_type='application/json'))
+                data = response.json()
+                data.pop('image', None)
+                path = f'/api/v1/product/crud/{data["id"]}/'
+                resave, _ = self.measure(lambda: client.put(path, data, content_type='application/json'))
+                change, _ = self.measure(lambda: client.put(path, self.changed(data), content_type='application/json'))
+                transaction.set_rollback(True)
+
+            self.stdout.write(f'{size:>13}{size * options["operations"]:>12}  '
+                              + ''.join(f'{f"{sql} sql {ms} ms":>14}' for sql, ms in (create, resave, change)))
+
+    def measure(self, request):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            elapsed = round((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise CommandError(f'{response.status_code}: {response.content[:500]}')
+        return (len(captured), elapsed), response
+
+    def payload(self, size, operations, consumables):
+        statuses = [CombinationStatus.CUT] + [CombinationStatus.DONE] * (size - 1)
+        return {
+            'title': 'Бенчмарк техкарты', 'vendor_code': f'BENCH-GP-{size}', 'is_active': True,
+            'prices': [{'title': 'Упаковка', 'price': '15'}],
+            'consumables': [
+                {'material_nomenclature': self.materials[i % len(self.materials)], 'consumption': '1.5', 'price': '0'}
+                for i in range(consumables)
+            ] if self.materials else [],
+            'combinations': [
+                {'title': f'Комбинация {c}', 'status': status, 'operations': [
+                    {'title': f'Операция {c}.{o}', 'price': '10', 'time': 60,
+                     'equipment': self.equipment[o % len(self.equipment)], 'rank': self.ranks[o % len(self.ranks)],
+                     'is_active': True}
+                    for o in range(operations)
+                ]}
+                for c, status in enumerate(statuses)
+            ],
+        }
+
+    def changed(self, data):
+        """Типичная правка: переименована комбинация, удалена последняя, добавлена новая, изменены операции."""
+        combinations = data['combinations']
+        replaced = next(i for i, c in enumerate(combinations) if c['status'] != CombinationStatus.CUT)
+        edited = next(i for i, c in enumerate(combinations) if i != replaced)
+        combinations[edited]['title'] += ' (изм.)'
+        for operation in combinations[edited]['operations']:
+            operation['price'] = '12'
+        combinations[replaced] = {
+            'title': 'Новая комбинация', 'status': CombinationStatus.DONE,
+            'operations': [{key: value for key, value in operation.items() if key != 'id'}
+                           for operation in combinations[replaced]['operations']],
+        }
+        return dict(data, combinations=combinations)
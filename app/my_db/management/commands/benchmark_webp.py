@@ -0,0 +1,94 @@
+import io
+import multiprocessing
+import os
+import resource
+import time
+
+from PIL import Image
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from my_db.compress import encode_webp, load_image
+
+
+def convert_bounded(data):
+    image = load_image(io.BytesIO(data))
+    encode_webp(image)
+    thumbnail = image
+    for size in sorted(settings.WEBP_THUMBNAIL_SIZES, reverse=True):
+        thumbnail = thumbnail.copy()
+        thumbnail.thumbnail((size, size))
+        encode_webp(thumbnail)
+
+
+def convert_unbounded(data):
+    # прежнее поведение: декодирование и сохранение в полном разрешении
+    Image.MAX_IMAGE_PIXELS = None
+    image = Image.open(io.BytesIO(data))
+    image_bytes = io.BytesIO()
+    image.save(fp=image_bytes, format="WEBP")
+
+
+def measure(convert, data, queue):
+    # ru_maxrss монотонен, поэтому прирост к моменту старта = пик памяти самой конвертации (в КБ на Linux)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    try:
+        convert(data)
+        error = ''
+    except Exception as e:
+        error = str(e)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, peak - baseline, error))
+
+
+def synthetic_jpeg(megapixels):
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    image_bytes = io.BytesIO()
+    image.save(image_bytes, format='JPEG', quality=90)
+    return image_bytes.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время и пиковую память конвертации изображений в WEBP (каждое - в отдельном процессе).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Файлы изображений. Без них генерируются JPEG-снимки.')
+        parser.add_argument('--megapixels', default='12,24,50',
+                            help='Размеры сгенерированных снимков в мегапикселях через запятую.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Дополнительно замерить конвертацию без ограничений (как раньше).')
+
+    def handle(self, *args, **options):
+        if options['paths']:
+            samples = []
+            for path in options['paths']:
+                with open(path, 'rb') as f:
+                    samples.append((os.path.basename(path), f.read()))
+        else:
+            samples = [
+                (f'{mp} MP jpeg', synthetic_jpeg(float(mp)))
+                for mp in options['megapixels'].split(',')
+            ]
+
+        modes = [('bounded', convert_bounded)]
+        if options['compare']:
+            modes.append(('unbounded', convert_unbounded))
+
+        context = multiprocessing.get_context('fork')
+        self.stdout.write(f'{"image":<20}{"mode":<12}{"time, s":>10}{"peak RSS, MB":>15}')
+        for title, data in samples:
+            for mode, convert in modes:
+                queue = context.Queue()
+                process = context.Process(target=measure, args=(convert, data, queue))
+                process.start()
+                elapsed, rss, error = queue.get()
+                process.join()
+
+                line = f'{title:<20}{mode:<12}{elapsed:>10.2f}{rss / 1024:>15.1f}'
+                if error:
+                    line += f'  ошибка: {error}'
+                self.stdout.write(line)
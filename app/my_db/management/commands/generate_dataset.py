@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from my_db.models import MyUser
+from utils.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные производства для нагрузочных тестов и benchmark_api.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1,
+                            help='Множитель объёмов: 1 - около 150 заказов и 7 тыс. выполненных операций.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='bench', help='Префикс логинов созданных пользователей.')
+        parser.add_argument('--force', action='store_true', help='Разрешить запуск при DEBUG=False.')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG=False: похоже на рабочую БД. Для запуска добавьте --force.')
+        if MyUser.objects.filter(username__startswith=f'{options["prefix"]}_').exists():
+            raise CommandError(f'Данные с префиксом {options["prefix"]} уже есть, укажите другой --prefix.')
+
+        start = time.perf_counter()
+        result = generate_dataset(options['prefix'], options['scale'], options['seed'])
+        for key, value in result.items():
+            self.stdout.write(f'{key:<20}{value}')
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.perf_counter() - start:.1f} с'))
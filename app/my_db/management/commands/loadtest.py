@@ -0,0 +1,56 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_db.models import MyUser
+from utils.loadtest import run_load
+
+# пары sync / async эндпоинтов для сравнения режимов WSGI и ASGI
+COMPARE_PATHS = [
+    ('/api/v1/dashboard/statistic/?date={date}', '/api/v1/async/dashboard/statistic/?date={date}'),
+    ('/api/v1/order/list/', '/api/v1/async/order/list/'),
+    ('/api/v1/warehouse/history/list/', '/api/v1/async/warehouse/history/list/'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест запущенного сервера: N одновременных соединений, задержки p50/p95/p99 по эндпоинтам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Адрес сервера.')
+        parser.add_argument('--username', required=True, help='Пользователь, от имени которого идут запросы.')
+        parser.add_argument('--path', action='append', default=[],
+                            help='Путь для нагрузки, можно несколько. Без него - сравнение sync и async эндпоинтов.')
+        parser.add_argument('--concurrency', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=5000, help='Запросов на каждый набор путей.')
+
+    def handle(self, *args, **options):
+        user = MyUser.objects.filter(username=options['username']).first()
+        if not user:
+            raise CommandError('Пользователь не найден.')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+        date = timezone.localdate().strftime('%d-%m-%Y')
+        if options['path']:
+            runs = [('custom', options['path'])]
+        else:
+            runs = [
+                ('sync', [sync.format(date=date) for sync, _ in COMPARE_PATHS]),
+                ('async', [async_path.format(date=date) for _, async_path in COMPARE_PATHS]),
+            ]
+
+        for title, paths in runs:
+            requests = [('GET', paths[i % len(paths)], None) for i in range(options['requests'])]
+            report = asyncio.run(run_load(options['url'], requests, options['concurrency'], headers=headers))
+            self.print_report(title, report)
+
+    def print_report(self, title, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(f'{"path":<55}{"req":>7}{"err":>6}{"rps":>8}{"p50":>9}{"p95":>9}{"p99":>9}')
+        for path, row in report.items():
+            self.stdout.write(
+                f'{path[:54]:<55}{row["requests"]:>7}{row["errors"]:>6}{row["rps"]:>8}'
+                f'{row["p50"]:>9}{row["p95"]:>9}{row["p99"]:>9}'
+            )
@@ -0,0 +1,67 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.profiling import read_profiles
+
+
+class Command(BaseCommand):
+    help = ('Худшие эндпоинты по сохранённым профилям (PROFILE_DIR). С --view - профили одного эндпоинта, '
+            'с --merge - их folded-стеки, сложенные в один файл для flamegraph.pl или speedscope.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--view', help='view_name эндпоинта.')
+        parser.add_argument('--merge', metavar='FILE', help='Сложить folded-стеки профилей --view в FILE.')
+
+    def handle(self, *args, **options):
+        if not settings.PROFILE_DIR:
+            raise CommandError('PROFILE_DIR не задан.')
+        profiles = read_profiles(settings.PROFILE_DIR)
+        if not profiles:
+            self.stdout.write('Профилей нет.')
+            return
+
+        if options['view']:
+            profiles = [profile for profile in profiles if profile['view'] == options['view']]
+            if options['merge']:
+                self.merge(profiles, options['merge'])
+            else:
+                self.list_profiles(profiles, options['top'])
+            return
+
+        by_view = defaultdict(list)
+        for profile in profiles:
+            by_view[profile['view']].append(profile)
+        rows = sorted(by_view.items(), key=lambda item: max(p['duration_ms'] for p in item[1]), reverse=True)
+
+        self.stdout.write(f'{"view":<55}{"count":>7}{"max ms":>10}{"avg ms":>10}{"avg sql":>9}  последний')
+        for view, items in rows[:options['top']]:
+            durations = [item['duration_ms'] for item in items]
+            queries = [item['queries'] for item in items if item['queries'] is not None]
+            avg_queries = f'{sum(queries) / len(queries):.0f}' if queries else '-'
+            self.stdout.write(f'{view[:54]:<55}{len(items):>7}{max(durations):>10.0f}'
+                              f'{sum(durations) / len(durations):>10.0f}{avg_queries:>9}  {items[-1]["file"]}')
+
+    def list_profiles(self, profiles, top):
+        profiles = sorted(profiles, key=lambda profile: profile['duration_ms'], reverse=True)
+        for profile in profiles[:top]:
+            self.stdout.write(f'{profile["duration_ms"]:>10.0f} ms {str(profile["queries"]):>5} sql  '
+                              f'{profile["method"]} {profile["path"]}  {profile["file"]}')
+
+    def merge(self, profiles, output):
+        total = Counter()
+        for profile in profiles:
+            if not profile['file'].endswith('.folded'):
+                continue
+            with open(os.path.join(settings.PROFILE_DIR, profile['file'])) as file:
+                for line in file:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    total[stack] += int(count)
+        if not total:
+            raise CommandError('Нет folded-профилей для объединения.')
+        with open(output, 'w') as file:
+            file.writelines(f'{stack} {count}\n' for stack, count in total.most_common())
+        self.stdout.write(self.style.SUCCESS(f'{output}: {len(total)} стеков'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from utils.combination import recalculate_combination_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает total_price и total_time всех комбинаций по их операциям.'
+
+    def handle(self, *args, **options):
+        updated = recalculate_combination_totals()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено комбинаций: {updated}'))
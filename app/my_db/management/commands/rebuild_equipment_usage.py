@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from my_db.models import WorkDetail
+from utils.equipment import refresh_equipment_usage
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает загрузку оборудования по дням (EquipmentUsage) из выполненных работ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Сколько последних дней пересчитать.')
+        parser.add_argument('--all', action='store_true', help='Пересчитать всю историю работ.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        date_from = today - timedelta(days=options['days'])
+        if options['all']:
+            first = WorkDetail.objects.aggregate(first=Min('created_at'))['first']
+            date_from = timezone.localtime(first).date() if first else today
+        rows = refresh_equipment_usage(date_from, today)
+        self.stdout.write(self.style.SUCCESS(f'Записано строк загрузки: {rows} ({date_from} - {today})'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from utils.costing import recalculate_product_costs
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает себестоимость изделий по техкарте: сырьё, операции с надбавкой разряда, доп. расходы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--material', type=int, action='append',
+                            help='Только изделия с этим сырьём (можно несколько раз).')
+
+    def handle(self, *args, **options):
+        updated = recalculate_product_costs(material_ids=options['material'])
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано изделий: {len(updated)}'))
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_db.enums import UserStatus, StaffRole
+from my_db.models import MyUser
+from utils.loadtest import run_load, LoadRequest
+from utils.request_log import read_request_log
+
+
+class Command(BaseCommand):
+    help = ('Воспроизводит журнал запросов (REQUEST_LOG_PATH) на локальном сервере: пропускная способность '
+            'и задержки p50/p95/p99 по маршрутам. Изменяющие запросы выполняются по-настоящему - только для dev-БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='JSONL-файл, записанный RequestRecorderMiddleware.')
+        parser.add_argument('--url', default='http://localhost:8000', help='Адрес сервера.')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--speed', type=float,
+                            help='Сохранять исходные интервалы между запросами, ускорив в N раз. '
+                                 'Без него запросы идут подряд с --concurrency соединениями.')
+        parser.add_argument('--since', help='Начало отрезка журнала, ISO-время UTC (например 2024-05-31T09:00).')
+        parser.add_argument('--until', help='Конец отрезка журнала, ISO-время UTC.')
+        parser.add_argument('--route', help='Только маршруты, содержащие подстроку (view_name или путь).')
+        parser.add_argument('--repeat', type=int, default=1, help='Повторить отрезок N раз.')
+        parser.add_argument('--read-only', action='store_true', help='Только GET-запросы.')
+        parser.add_argument('--user', action='append', default=[],
+                            help='Пользователь для роли: director=ivan. По умолчанию - первый пользователь с ролью.')
+
+    def handle(self, *args, **options):
+        records = list(read_request_log(options['log'], options['since'], options['until'], options['route']))
+        if not records:
+            raise CommandError('В журнале нет подходящих запросов.')
+
+        users = dict(item.split('=', 1) for item in options['user'])
+        tokens = {}
+        requests, skipped = [], 0
+        start = datetime.fromisoformat(records[0]['ts'])
+        duration = (datetime.fromisoformat(records[-1]['ts']) - start).total_seconds()
+
+        for repeat in range(options['repeat']):
+            for record in records:
+                if options['read_only'] and record['method'] != 'GET':
+                    continue
+                # тела загрузок файлов не записываются - такие запросы воспроизвести нельзя
+                if record['body_skipped']:
+                    skipped += 1
+                    continue
+
+                role = record['role']
+                if role not in tokens:
+                    tokens[role] = self.token_for(role, users.get(role))
+                if role != 'anonymous' and tokens[role] is None:
+                    skipped += 1
+                    continue
+
+                headers = {'Content-Type': 'application/json'}
+                if tokens[role]:
+                    headers['Authorization'] = f'Bearer {tokens[role]}'
+                delay = None
+                if options['speed']:
+                    offset = (datetime.fromisoformat(record['ts']) - start).total_seconds()
+                    delay = (repeat * duration + offset) / options['speed']
+
+                body = json.dumps(record['body']) if record['body'] is not None else None
+                requests.append(LoadRequest(record['method'], record['path'], body, headers,
+                                            f'{record["method"]} {record["route"] or record["path"]}', delay))
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Пропущено запросов: {skipped} (файлы или нет пользователя с ролью)'))
+        if not requests:
+            raise CommandError('Нечего воспроизводить.')
+
+        report = asyncio.run(run_load(options['url'], requests, options['concurrency']))
+        self.stdout.write(f'{"route":<55}{"req":>7}{"err":>6}{"rps":>8}{"p50":>9}{"p95":>9}{"p99":>9}')
+        for route, row in report.items():
+            self.stdout.write(
+                f'{route[:54]:<55}{row["requests"]:>7}{row["errors"]:>6}{row["rps"]:>8}'
+                f'{row["p50"]:>9}{row["p95"]:>9}{row["p99"]:>9}'
+            )
+
+    def token_for(self, role, username=None):
+        if role == 'anonymous':
+            return ''
+        if username:
+            user = MyUser.objects.filter(username=username).first()
+        elif role == 'client':
+            user = MyUser.objects.filter(status=UserStatus.CLIENT).order_by('id').first()
+        elif role == 'admin':
+            user = MyUser.objects.filter(status=UserStatus.ADMIN).order_by('id').first()
+        else:
+            user = MyUser.objects.filter(status=UserStatus.STAFF, staff_profile__role=StaffRole[role.upper()]) \
+                .order_by('id').first()
+        if not user:
+            self.stdout.write(self.style.WARNING(f'Нет пользователя для роли {role}'))
+            return None
+        return str(RefreshToken.for_user(user).access_token)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from my_db.enums import PaymentStatus
+from my_db.models import Payment
+from utils.payment import create_payment_lines
+
+
+class Command(BaseCommand):
+    help = 'Создает снимки операций (PaymentLine) для выплат ЗП, закрытых до их появления.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        payment_ids = list(
+            Payment.objects.filter(status=PaymentStatus.SALARY, lines__isnull=True)
+            .values_list('id', flat=True)
+        )
+
+        created = 0
+        for i in range(0, len(payment_ids), chunk_size):
+            created += len(create_payment_lines(payment_ids[i:i + chunk_size]))
+
+        self.stdout.write(self.style.SUCCESS(f'Выплат: {len(payment_ids)}, создано строк: {created}'))
@@ -3,7 +3,7 @@ from django.db import models
 
 from .compress import staff_image_folder, WEBPField, equipment_image_folder, nom_image_folder
 from .enums import UserStatus, StaffRole, NomType, NomUnit, QuantityStatus, OrderStatus, PaymentStatus, \
-    PartyStatus, WorkStatus, CombinationStatus, NomStatus
+    PartyStatus, WorkStatus, CombinationStatus, NomStatus, ImportStatus, UploadTarget, UploadStatus
 
 
 # ______________________________ User ______________________________
@@ -98,6 +98,45 @@ class Color(models.Model):
         ordering = ['-id']
 
 
+class ChunkedUpload(models.Model):  # загрузка большого файла частями, см. endpoints/views/upload.py
+    user = models.ForeignKey(MyUser, on_delete=models.CASCADE, related_name='uploads')
+    target = models.IntegerField(choices=UploadTarget.choices)
+    object_id = models.IntegerField()
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.IntegerField(choices=UploadStatus.choices, default=UploadStatus.NEW)
+    file_id = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-id']
+
+
+class TaskKey(models.Model):  # ключи идемпотентности выполненных Celery задач, см. tasks/base.py
+    key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class OutboxMessage(models.Model):  # Celery задача, поставленная в транзакции, см. utils/outbox.py
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=64)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # одинаковая задача, ещё не отправленная в брокер, хранится один раз
+            models.UniqueConstraint(fields=['dedup_key'], condition=models.Q(sent_at__isnull=True),
+                                    name='outbox_pending_dedup_key'),
+        ]
+
+
 # ______________________________ General end ______________________________
 
 
@@ -155,6 +194,8 @@ class Combination(models.Model):
     is_sample = models.BooleanField(default=False)
     status = models.IntegerField(choices=CombinationStatus.choices, blank=True, null=True,
                                  default=CombinationStatus.ZERO)
+    total_price = models.DecimalField(max_digits=12, decimal_places=3, default=0)  # сумма цен операций
+    total_time = models.IntegerField(default=0)  # secs, сумма времени операций
 
     def __str__(self):
         return f'{self.id}. {self.title}'
@@ -200,6 +241,19 @@ class EquipmentService(models.Model):
         ordering = ['-id']
 
 
+class EquipmentUsage(models.Model):  # машинное время за день, пересчитывается ночью, см. utils/equipment.py
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='usages')
+    date = models.DateField()
+    seconds = models.BigIntegerField(default=0)  # выполнено единиц x время операций на этой машине
+    operations = models.IntegerField(default=0)  # выполнено операций на этой машине
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['equipment', 'date'], name='equipment_usage_day'),
+        ]
+
+
 class Operation(models.Model):
     title = models.CharField(max_length=100)
     time = models.IntegerField(default=0)  # secs
@@ -307,6 +361,23 @@ class NomCount(models.Model):
     )
     amount = models.DecimalField(max_digits=12, decimal_places=3, default=0)
 
+
+class ImportJob(models.Model):
+    staff = models.ForeignKey(
+        StaffProfile, on_delete=models.SET_NULL, blank=True, null=True, related_name='import_jobs'
+    )
+    file = models.FileField(upload_to='imports')
+    status = models.IntegerField(choices=ImportStatus.choices, default=ImportStatus.NEW)
+    processed = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-id']
+
 # ______________________________ Warehouse end ______________________________
 
 
@@ -322,9 +393,16 @@ class Order(models.Model):
                                      related_name='in_orders')  # это склад, куда попадает ГП после статуса "ГОТОВО"
     out_warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, blank=True, null=True,
                                       related_name='out_orders')  # это склад, откуда спишется сырье после статуса "ГОТОВО"
+    overdue_at = models.DateTimeField(blank=True, null=True)  # когда mark_overdue_orders перевёл в "ПРОСРОЧЕН"
+    # статус до просрочки (НОВЫЙ или В ПРОЦЕССЕ) - возвращается при переносе срока
+    status_before_overdue = models.IntegerField(choices=OrderStatus.choices, blank=True, null=True)
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # фильтр по статусу в списках и поиск просроченных: status IN (...) AND deadline < now
+            models.Index(fields=['status', 'deadline'], name='order_status_deadline'),
+        ]
 
 
 class OrderProduct(models.Model):
@@ -430,6 +508,17 @@ class PaymentFile(models.Model):
     payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='files')
     file = models.FileField(upload_to='payments')
 
+
+class PaymentLine(models.Model):  # снимок оплаченных операций на момент закрытия периода
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='lines')
+    combination_id = models.IntegerField(blank=True, null=True)
+    combination_title = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    amount = models.IntegerField(default=0)
+    total_price = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    party_number = models.CharField(max_length=100, blank=True, null=True)
+    order_id = models.IntegerField(blank=True, null=True)
+
 # ______________________________ Payment end ______________________________
 
 
@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .compress import WEBPField
+from .models import Combination, Operation
+
+_state = threading.local()
+
+
+@contextmanager
+def combination_totals_deferred():
+    """Внутри блока удаление операций не пересчитывает суммы комбинаций - вызывающий пересчитывает их сам."""
+    previous = getattr(_state, 'deferred', False)
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+@receiver(m2m_changed, sender=Combination.operations.through)
+def combination_operations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    from utils.combination import recalculate_combination_totals
+
+    if reverse and action == 'pre_clear':
+        instance._cleared_combination_ids = list(instance.combinations.values_list('id', flat=True))
+        return
+
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if not reverse:
+        recalculate_combination_totals([instance.pk])
+    elif action == 'post_clear':
+        recalculate_combination_totals(getattr(instance, '_cleared_combination_ids', []))
+    elif pk_set:
+        recalculate_combination_totals(pk_set)
+
+
+@receiver(post_save, sender=Operation)
+def operation_saved(sender, instance, created, **kwargs):
+    from utils.combination import recalculate_combination_totals
+
+    if created:
+        return
+    recalculate_combination_totals(instance.combinations.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Operation)
+def operation_pre_delete(sender, instance, **kwargs):
+    if getattr(_state, 'deferred', False):
+        return
+    instance._combination_ids = list(instance.combinations.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Operation)
+def operation_deleted(sender, instance, **kwargs):
+    from utils.combination import recalculate_combination_totals
+
+    combination_ids = getattr(instance, '_combination_ids', [])
+    if combination_ids:
+        recalculate_combination_totals(combination_ids)
+
+
+def schedule_webp_conversion(sender, instance, **kwargs):
+    from utils.media import convert_images_later
+
+    for field in sender._meta.fields:
+        if isinstance(field, WEBPField):
+            convert_images_later([instance], field.name)
+
+
+for model in apps.get_app_config('my_db').get_models():
+    if any(isinstance(field, WEBPField) for field in model._meta.fields):
+        post_save.connect(schedule_webp_conversion, sender=model)
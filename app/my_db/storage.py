@@ -0,0 +1,58 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_NAME_RE = re.compile(r'^(?P<hash>[0-9a-f]{64})(?:_(?P<size>\d+))?\.\w+$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы именуются SHA-256 от содержимого: <папка>/<hash><расширение>.
+    Одинаковые файлы хранятся один раз, на них ссылаются все записи.
+    delete() ничего не удаляет - файл может быть нужен другим записям,
+    неиспользуемые файлы убирает tasks.media.cleanup_orphan_media.
+    """
+
+    def hashed_name(self, name, content):
+        sha256 = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, sha256.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # файл снова используется: свежий mtime, чтобы cleanup_orphan_media не удалил его
+            # в пределах MEDIA_ORPHAN_GRACE_HOURS, пока ссылающаяся запись ещё не сохранена
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def save_derived(self, name, content):
+        """Производный файл (миниатюра) сохраняется под заданным именем - оно уже задано хэшем основного файла."""
+        if self.exists(name):
+            os.utime(self.path(name))
+        else:
+            self._save(name, content)
+        return name
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name):
+        super().delete(name)
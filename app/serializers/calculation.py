@@ -236,3 +236,31 @@ class GETProductInfoSerializer(serializers.ModelSerializer):
         model = Nomenclature
         fields = ['id', 'vendor_code','title', 'combinations', 'consumables', 'prices']
 
+
+
+class ComputeOperationSerializer(serializers.Serializer):
+    title = serializers.CharField(required=False, allow_blank=True)
+    time = serializers.IntegerField(default=0)
+    price = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, allow_null=True)
+    rank = serializers.IntegerField(required=False, allow_null=True)
+
+
+class ComputeCombinationSerializer(serializers.Serializer):
+    title = serializers.CharField(required=False, allow_blank=True)
+    operations = ComputeOperationSerializer(many=True, required=False)
+
+
+class ComputeConsumableSerializer(serializers.Serializer):
+    nomenclature = serializers.IntegerField(required=False, allow_null=True)
+    title = serializers.CharField(required=False, allow_blank=True)
+    consumption = serializers.DecimalField(max_digits=12, decimal_places=3)
+    price = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, allow_null=True)
+
+
+class CalculationComputeSerializer(serializers.Serializer):
+    """Черновик калькуляции в формате CalculationSerializer; id не проверяются запросами к БД."""
+    count = serializers.IntegerField(required=False, min_value=1)
+    price = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, allow_null=True)
+    combinations = ComputeCombinationSerializer(many=True, required=False)
+    cal_consumables = ComputeConsumableSerializer(many=True, required=False)
+    cal_prices = CalPriceSerializer(many=True, required=False)
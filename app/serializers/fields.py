@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+
+class ThumbnailsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения WEBPField: {размер: url}. Пусто, пока идет конвертация."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        request = self.context.get('request')
+        return {
+            size: request.build_absolute_uri(url) if request else url
+            for size, url in value.thumbnail_urls().items()
+        }
@@ -1,11 +1,13 @@
 from django.db import transaction
-from jsonschema.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
 from my_db.enums import NomType
 from my_db.models import Nomenclature, Pattern, Operation, Combination, Rank, Equipment, Consumable, \
     EquipmentImages, EquipmentService, StaffProfile, Price, NomFile
-from utils.nomenclature import has_cut_combination
+from serializers.fields import ThumbnailsField
+from utils.costing import recalculate_product_costs
+from utils.nomenclature import has_cut_combination, save_tech_card
 
 
 class GPListSerializer(serializers.ModelSerializer):
@@ -21,9 +23,11 @@ class MaterialListSerializer(serializers.ModelSerializer):
 
 
 class PatternSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField(source='image')
+
     class Meta:
         model = Pattern
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'thumbnails']
 
 
 class FileSerializer(serializers.ModelSerializer):
@@ -33,9 +37,11 @@ class FileSerializer(serializers.ModelSerializer):
 
 
 class EquipmentImagesSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField(source='image')
+
     class Meta:
         model = EquipmentImages
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'thumbnails']
 
 
 class EquipmentServiceStaffSerializer(serializers.ModelSerializer):
@@ -162,12 +168,20 @@ class ConsumableSerializer(serializers.ModelSerializer):
 
 
 class ConsumableCreateSerializer(serializers.ModelSerializer):
+    # id вместо PrimaryKeyRelatedField: существование проверяется одним запросом в GPCRUDSerializer.validate
+    material_nomenclature = serializers.IntegerField(source='material_nomenclature_id', required=False,
+                                                     allow_null=True)
+
     class Meta:
         model = Consumable
         fields = ['material_nomenclature', 'consumption', 'unit', 'price']
 
 
 class OperationCreateSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    equipment = serializers.IntegerField(source='equipment_id', required=False, allow_null=True)
+    rank = serializers.IntegerField(source='rank_id', required=False, allow_null=True)
+
     class Meta:
         model = Operation
         fields = ['id', 'title', 'price', 'time', 'equipment', 'rank', 'is_active']
@@ -192,6 +206,7 @@ class GPDetailSerializer(serializers.ModelSerializer):
 
 
 class CombinationCreateSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
     operations = OperationCreateSerializer(required=False, many=True)
 
     class Meta:
@@ -209,6 +224,21 @@ class GPCRUDSerializer(serializers.ModelSerializer):
         fields = ['id', 'vendor_code', 'is_active', 'title', 'cost_price', 'image',
                   'prices', 'consumables', 'combinations']
 
+    def validate(self, attrs):
+        operations = [o for c in attrs.get('combinations', []) for o in c.get('operations', [])]
+        references = [
+            ('equipment', Equipment, {o['equipment_id'] for o in operations if o.get('equipment_id')}),
+            ('rank', Rank, {o['rank_id'] for o in operations if o.get('rank_id')}),
+            ('material_nomenclature', Nomenclature,
+             {c['material_nomenclature_id'] for c in attrs.get('consumables', []) if c.get('material_nomenclature_id')}),
+        ]
+        for field, model, ids in references:
+            missing = ids - set(model.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+            if missing:
+                raise ValidationError({field: f'Не найдены id: {sorted(missing)}'})
+        return attrs
+
+    @transaction.atomic
     def create(self, validated_data):
         prices_data = validated_data.pop('prices', [])
         consumables_data = validated_data.pop('consumables', [])
@@ -222,18 +252,10 @@ class GPCRUDSerializer(serializers.ModelSerializer):
 
         Price.objects.bulk_create([Price(nomenclature=nomenclature, **data) for data in prices_data])
         Consumable.objects.bulk_create([Consumable(nomenclature=nomenclature, **data) for data in consumables_data])
+        save_tech_card(nomenclature, combinations_data)
+        return self.saved(nomenclature)
 
-        for data in combinations_data:
-            c_operations_data = data.pop('operations')
-            create_data = [Operation(nomenclature=nomenclature, **data) for data in c_operations_data]
-            c_operations = Operation.objects.bulk_create(create_data)
-            operations_ids = [op.id for op in c_operations]
-
-            combination = Combination.objects.create(nomenclature=nomenclature, **data)
-            combination.operations.set(operations_ids)
-
-        return nomenclature
-
+    @transaction.atomic
     def update(self, instance, validated_data):
         prices_data = validated_data.pop('prices', [])
         consumables_data = validated_data.pop('consumables', [])
@@ -243,26 +265,20 @@ class GPCRUDSerializer(serializers.ModelSerializer):
 
         nomenclature = super().update(instance, validated_data)
 
-        with transaction.atomic():
-            nomenclature.prices.all().delete()
-            nomenclature.combinations.all().delete()
-            nomenclature.operations.all().delete()
-            nomenclature.consumables.all().delete()
-
+        # на цены и расход сырья ничего не ссылается - заменяются целиком, двумя запросами на каждую таблицу
+        nomenclature.prices.all().delete()
+        nomenclature.consumables.all().delete()
         Price.objects.bulk_create([Price(nomenclature=nomenclature, **data) for data in prices_data])
         Consumable.objects.bulk_create([Consumable(nomenclature=nomenclature, **data) for data in consumables_data])
-
-        for data in combinations_data:
-            c_operations_data = data.pop('operations')
-            create_data = [Operation(nomenclature=nomenclature, **data) for data in c_operations_data]
-            c_operations = Operation.objects.bulk_create(create_data)
-            operations_ids = [op.id for op in c_operations]
-
-            combination = Combination.objects.create(nomenclature=nomenclature, **data)
-            combination.operations.set(operations_ids)
-            combination.save()
-
-        return nomenclature
+        # комбинации и операции - по id: изменённые обновляются, новые создаются, лишние удаляются
+        save_tech_card(nomenclature, combinations_data)
+        return self.saved(nomenclature)
+
+    def saved(self, nomenclature):
+        """Себестоимость по новой техкарте и объект с prefetch для ответа без запросов на каждую комбинацию."""
+        recalculate_product_costs(nomenclature_ids=[nomenclature.id])
+        return Nomenclature.objects.prefetch_related('prices', 'consumables', 'combinations__operations') \
+            .get(id=nomenclature.id)
 
 
 class PatternCRUDSerializer(serializers.Serializer):
@@ -1,4 +1,6 @@
+from django.db import transaction
 from django.db.models import Sum
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -7,6 +9,7 @@ from my_db.models import Order, ClientProfile, OrderProductAmount, OrderProduct,
     Color, StaffProfile, WorkDetail, Warehouse, PartyConsumable
 from tasks.order import gp_move_in_warehouse, material_move_out_warehouse
 from utils.order import duplicate_nomenclature
+from utils.outbox import enqueue
 
 
 class OrderClientSerializer(serializers.ModelSerializer):
@@ -56,6 +59,33 @@ class SizeSerializer(serializers.ModelSerializer):
         fields = ['id', 'title']
 
 
+def cut_amount(amount):
+    """Раскроено по позиции заказа: сумма true_amount деталей партий изделия того же цвета и размера.
+    Партии и детали берутся из prefetch заказа (OrderReadView), без запросов на каждую позицию."""
+    order_product = amount.order_product
+    return sum(
+        detail.true_amount
+        for party in order_product.order.parties.all() if party.nomenclature_id == order_product.nomenclature_id
+        for detail in party.details.all() if detail.color_id == amount.color_id and detail.size_id == amount.size_id
+    )
+
+
+def work_amount(amount, status):
+    """Выполнено по позиции заказа на этапе status. Суммы по всему заказу считаются одним запросом и
+    запоминаются на заказе."""
+    order = amount.order_product.order
+    if not hasattr(order, '_work_amounts'):
+        order._work_amounts = {
+            (row['work__party__nomenclature'], row['work__color'], row['work__size'], row['combination__status']):
+                row['total']
+            for row in WorkDetail.objects.filter(work__party__order=order).order_by()
+            .values('work__party__nomenclature', 'work__color', 'work__size', 'combination__status')
+            .annotate(total=Sum('amount'))
+        }
+    key = (amount.order_product.nomenclature_id, amount.color_id, amount.size_id, status)
+    return order._work_amounts.get(key) or 0
+
+
 class GETOrderProductAmountSerializer(serializers.ModelSerializer):
     size = SizeSerializer()
     color = ColorSerializer()
@@ -68,40 +98,13 @@ class GETOrderProductAmountSerializer(serializers.ModelSerializer):
         fields = ['size', 'amount', 'done', 'color', 'cut', 'defect', 'otk']
 
     def get_cut(self, obj):
-        order = obj.order_product.order
-        nomenclature = obj.order_product.nomenclature
-
-        return sum(
-            detail.true_amount
-            for party in order.parties.filter(nomenclature=nomenclature)
-            for detail in party.details.filter(color=obj.color, size=obj.size)
-        )
+        return cut_amount(obj)
 
     def get_otk(self, obj):
-        order = obj.order_product.order
-        nomenclature = obj.order_product.nomenclature
-
-        return (
-                WorkDetail.objects.filter(
-                    work__party__in=order.parties.filter(nomenclature=nomenclature),
-                    work__color=obj.color,
-                    work__size=obj.size,
-                    combination__status=CombinationStatus.OTK
-                ).aggregate(total=Sum('amount'))['total'] or 0
-        )
+        return work_amount(obj, CombinationStatus.OTK)
 
     def get_done(self, obj):
-        order = obj.order_product.order
-        nomenclature = obj.order_product.nomenclature
-
-        return (
-                WorkDetail.objects.filter(
-                    work__party__in=order.parties.filter(nomenclature=nomenclature),
-                    work__color=obj.color,
-                    work__size=obj.size,
-                    combination__status=CombinationStatus.DONE
-                ).aggregate(total=Sum('amount'))['total'] or 0
-        )
+        return work_amount(obj, CombinationStatus.DONE)
 
 
 class ClientGETOrderProductAmountSerializer(serializers.ModelSerializer):
@@ -115,27 +118,10 @@ class ClientGETOrderProductAmountSerializer(serializers.ModelSerializer):
         fields = ['size', 'amount', 'done', 'color', 'cut']
 
     def get_cut(self, obj):
-        order = obj.order_product.order
-        nomenclature = obj.order_product.nomenclature
-
-        return sum(
-            detail.true_amount
-            for party in order.parties.filter(nomenclature=nomenclature)
-            for detail in party.details.filter(color=obj.color, size=obj.size)
-        )
+        return cut_amount(obj)
 
     def get_done(self, obj):
-        order = obj.order_product.order
-        nomenclature = obj.order_product.nomenclature
-
-        return (
-                WorkDetail.objects.filter(
-                    work__party__in=order.parties.filter(nomenclature=nomenclature),
-                    work__color=obj.color,
-                    work__size=obj.size,
-                    combination__status=CombinationStatus.DONE
-                ).aggregate(total=Sum('amount'))['total'] or 0
-        )
+        return work_amount(obj, CombinationStatus.DONE)
 
 
 class GETOrderProductSerializer(serializers.ModelSerializer):
@@ -209,8 +195,8 @@ class OrderDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = ['id', 'client', 'status', 'deadline', 'created_at', 'true_deadline', 'products', 'parties',
-                  'in_warehouse', 'out_warehouse']
+        fields = ['id', 'client', 'status', 'deadline', 'created_at', 'true_deadline', 'overdue_at', 'products',
+                  'parties', 'in_warehouse', 'out_warehouse']
 
 
 class ClientOrderDetailSerializer(serializers.ModelSerializer):
@@ -265,6 +251,7 @@ class OrderCRUDSerializer(serializers.ModelSerializer):
 
         return order
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if instance.status == OrderStatus.DONE:
             raise ValidationError("Вы не можете редактировать заказ, так как он уже готов.")
@@ -273,6 +260,14 @@ class OrderCRUDSerializer(serializers.ModelSerializer):
 
         for key, value in validated_data.items():
             setattr(instance, key, value)
+        if instance.status == OrderStatus.OVERDUE and instance.deadline > timezone.now():
+            # срок перенесён - возвращается статус до просрочки, при новой просрочке mark_overdue_orders отметит заново;
+            # у заказов, просроченных до появления status_before_overdue, статус определяется по наличию партий
+            instance.status = instance.status_before_overdue or (
+                OrderStatus.PROGRESS if instance.parties.exists() else OrderStatus.NEW
+            )
+            instance.overdue_at = None
+            instance.status_before_overdue = None
         instance.save()
 
         instance.products.all().delete()
@@ -291,8 +286,8 @@ class OrderCRUDSerializer(serializers.ModelSerializer):
         if instance.status == OrderStatus.DONE:
             staff = self.context['request'].user.staff_profile
             if instance.in_warehouse:
-                gp_move_in_warehouse.delay(instance.id, staff.id)
+                enqueue(gp_move_in_warehouse, instance.id, staff.id)
             if instance.out_warehouse:
-                material_move_out_warehouse.delay(instance.id, staff.id)
+                enqueue(material_move_out_warehouse, instance.id, staff.id)
 
         return instance
\ No newline at end of file
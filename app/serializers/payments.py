@@ -1,7 +1,7 @@
 from django.db.models import Sum, F, DecimalField, ExpressionWrapper
 from rest_framework import serializers
 
-from my_db.models import PaymentFile, Payment, WorkDetail, StaffProfile
+from my_db.models import PaymentFile, Payment, WorkDetail, StaffProfile, PaymentLine
 
 
 class WorkPaymentFileCRUDSerializer(serializers.Serializer):
@@ -61,6 +61,22 @@ class SalaryCreateSerializer(serializers.Serializer):
     date_until = serializers.DateField()
 
 
+class SalaryBatchSerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_until = serializers.DateField()
+    staff_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Список ID сотрудников. Если не передан, ЗП считается всем сотрудникам с неоплаченными работами."
+    )
+
+
+class SalaryBatchStatusSerializer(serializers.Serializer):
+    task_id = serializers.CharField()
+    status = serializers.CharField()
+    result = serializers.JSONField()
+
+
 class AggregatedOperationSerializer(serializers.Serializer):
     operation_title = serializers.CharField()
     total_amount = serializers.IntegerField()
@@ -70,6 +86,16 @@ class AggregatedOperationSerializer(serializers.Serializer):
     party_number = serializers.CharField()
 
 
+class PaymentLineSerializer(serializers.ModelSerializer):
+    operation_title = serializers.CharField(source='combination_title')
+    total_amount = serializers.IntegerField(source='amount')
+    operation_price = serializers.DecimalField(source='price', max_digits=12, decimal_places=3)
+
+    class Meta:
+        model = PaymentLine
+        fields = ['operation_title', 'total_amount', 'operation_price', 'total_price', 'order_id', 'party_number']
+
+
 class StaffProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = StaffProfile
@@ -87,15 +113,19 @@ class WorkPaymentDetailSerializer(serializers.ModelSerializer):
                   'date_until']
 
     def get_operations(self, obj):
+        lines = obj.lines.all()
+        if lines:
+            return PaymentLineSerializer(lines, many=True).data
+
         operations = (
             WorkDetail.objects.filter(payment=obj)
-            .annotate(
+            .values(
                 operation_title=F('combination__title'),
-                operation_price=F('combination__operations__price'),
-                total_amount=Sum('amount'),
+                operation_price=F('combination__total_price'),
                 party_number=F('work__party__number'),
-                order_id=F('work__party__order__id')
+                order_id=F('work__party__order_id')
             )
+            .annotate(total_amount=Sum('amount'))
             .annotate(
                 total_price=ExpressionWrapper(
                     F('operation_price') * F('total_amount'),
@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from my_db.models import ChunkedUpload
+from utils.upload import UPLOAD_TARGETS
+
+
+class ChunkedUploadInitSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['target', 'object_id', 'filename', 'size']
+        extra_kwargs = {
+            'object_id': {'help_text': 'ID товара, клиента, оплаты или брака - в зависимости от target.'},
+            'size': {'help_text': 'Полный размер файла в байтах.'},
+        }
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Размер файла должен быть больше нуля.')
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Размер файла больше допустимых {settings.CHUNKED_UPLOAD_MAX_SIZE} байт.'
+            )
+        return value
+
+    def validate(self, attrs):
+        _, _, owner_model = UPLOAD_TARGETS[attrs['target']]
+        if not owner_model.objects.filter(id=attrs['object_id']).exists():
+            raise serializers.ValidationError({'object_id': 'Объект не найден.'})
+        return attrs
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'target', 'object_id', 'filename', 'size', 'offset', 'status', 'file_id', 'created_at',
+                  'updated_at']
@@ -1,8 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from my_db.enums import NomType
 from my_db.models import Warehouse, StaffProfile, Nomenclature, NomCount, Quantity, QuantityNomenclature, \
-    QuantityHistory, QuantityFile
+    QuantityHistory, QuantityFile, ImportJob
+from tasks.product import change_product_cost_price
+from utils.outbox import enqueue
 
 
 class WarehouseStaffSerializer(serializers.ModelSerializer):
@@ -70,6 +73,14 @@ class MaterialCRUDSerializer(serializers.ModelSerializer):
         NomCount.objects.bulk_create(create_data)
         return obj
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        old_cost_price = instance.cost_price
+        obj = super().update(instance, validated_data)
+        if obj.cost_price != old_cost_price:
+            enqueue(change_product_cost_price, [obj.id])
+        return obj
+
 
 class CreateMaterialsDetailSerializer(serializers.Serializer):
     color = serializers.IntegerField()
@@ -83,6 +94,24 @@ class CreateMaterialsSerializer(serializers.Serializer):
     details = CreateMaterialsDetailSerializer(many=True)
 
 
+class MaterialImportSerializer(serializers.Serializer):
+    file = serializers.FileField(
+        help_text="CSV (UTF-8) или XLSX файл. Колонки: vendor_code, title, unit, color, coefficient, cost_price, "
+                  "status. unit и status - ID или название, color - ID или название цвета."
+    )
+
+    def validate_file(self, value):
+        if not value.name.lower().endswith(('.csv', '.xlsx')):
+            raise serializers.ValidationError('Поддерживаются только файлы CSV и XLSX.')
+        return value
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'status', 'processed', 'created', 'updated', 'errors', 'created_at', 'finished_at']
+
+
 class StockInputSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
     amount = serializers.IntegerField()
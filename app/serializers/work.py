@@ -1,4 +1,5 @@
 
+from django.db import transaction
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
@@ -6,6 +7,8 @@ from my_db.enums import CombinationStatus, StaffRole, WorkStatus
 from my_db.models import StaffProfile, Combination, Operation, Nomenclature, Work, WorkDetail, \
     PartyConsumable, PartyDetail, Party, Order, OrderProduct, OrderProductAmount, Size, Color, ClientProfile
 from tasks.warehouse import write_off_from_warehouse
+from utils.events import notify_order_progress
+from utils.outbox import enqueue
 
 
 class WorkStaffListSerializer(serializers.ModelSerializer):
@@ -79,6 +82,7 @@ class PartyCreateUpdateSerializer(serializers.ModelSerializer):
         model = Party
         fields = ['order', 'nomenclature', 'number', 'details', 'consumptions']
 
+    @transaction.atomic
     def create(self, validated_data):
         details = validated_data.pop('details', [])
         consumptions = validated_data.pop('consumptions', [])
@@ -111,10 +115,12 @@ class PartyCreateUpdateSerializer(serializers.ModelSerializer):
         ])
 
         consumables__ids = [obj.id for obj in consumables]
-        write_off_from_warehouse.delay(staff.id, consumables__ids)
+        enqueue(write_off_from_warehouse, staff.id, consumables__ids)
+        notify_order_progress(party.order_id)
 
         return party
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         details = validated_data.pop('details', [])
         consumptions = validated_data.pop('consumptions', [])
@@ -154,7 +160,8 @@ class PartyCreateUpdateSerializer(serializers.ModelSerializer):
         ])
 
         consumables__ids = [obj.id for obj in consumables]
-        write_off_from_warehouse.delay(staff.id, consumables__ids)
+        enqueue(write_off_from_warehouse, staff.id, consumables__ids)
+        notify_order_progress(instance.order_id)
 
         return instance
 
@@ -317,6 +324,7 @@ class WorkCRUDSerializer(serializers.ModelSerializer):
         details = WorkDetail.objects.bulk_create([
             WorkDetail(work=work, **data) for data in details
         ])
+        notify_order_progress(work.party.order_id if work.party else None)
 
         return work
 
@@ -334,6 +342,7 @@ class WorkCRUDSerializer(serializers.ModelSerializer):
             WorkDetail(work=instance, **data) for data in details
         ])
         instance.save()
+        notify_order_progress(instance.party.order_id if instance.party else None)
         return instance
 
 
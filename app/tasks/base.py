@@ -0,0 +1,46 @@
+import hashlib
+import inspect
+import json
+from datetime import timedelta
+
+from celery import Task
+from django.db import transaction
+from django.utils import timezone
+
+from main_conf.celery import app
+
+from my_db.models import TaskKey
+
+
+class IdempotentTask(Task):
+    """
+    Задача, которая меняет данные не больше одного раза на один ключ.
+    Ключ - имя задачи и аргументы из idempotency_args (по умолчанию все). Тело выполняется в одной
+    транзакции вместе с записью ключа: при повторной доставке (acks_late, падение воркера,
+    двойной вызов .delay) ключ уже есть и задача ничего не делает. Если тело упало - откатывается
+    и ключ, задачу можно выполнить снова.
+    """
+    acks_late = True
+    reject_on_worker_lost = True
+    idempotency_args = None
+
+    def idempotency_key(self, args, kwargs):
+        arguments = inspect.signature(self.run).bind(*args, **kwargs).arguments
+        if self.idempotency_args is not None:
+            arguments = {name: arguments.get(name) for name in self.idempotency_args}
+        payload = json.dumps(arguments, sort_keys=True, default=str)
+        return f'{self.name}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+    def __call__(self, *args, **kwargs):
+        with transaction.atomic():
+            _, created = TaskKey.objects.get_or_create(key=self.idempotency_key(args, kwargs))
+            if not created:
+                return None
+            return super().__call__(*args, **kwargs)
+
+
+@app.task
+def purge_task_keys(days=30):
+    """Повторная доставка случается в пределах часов, старые ключи больше не нужны."""
+    deleted, _ = TaskKey.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
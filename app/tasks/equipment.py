@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main_conf.celery import app
+from utils.equipment import refresh_equipment_usage
+
+
+@app.task
+def refresh_equipment_usage_task(days=7):
+    """Пересчитывает загрузку оборудования за последние days дней (работы могут вноситься задним числом)."""
+    today = timezone.localdate()
+    return refresh_equipment_usage(today - timedelta(days=days), today)
@@ -0,0 +1,57 @@
+import logging
+
+from PIL import Image
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from main_conf.celery import app
+from my_db.compress import ImageTooLarge, is_pending, webp_name, save_webp_variants
+
+logger = logging.getLogger(__name__)
+
+
+@app.task
+def convert_to_webp(model_label, ids, field_name):
+    model = apps.get_model(model_label)
+
+    for obj in model.objects.filter(id__in=ids):
+        field_file = getattr(obj, field_name)
+        pending_name = field_file.name
+        if not is_pending(pending_name):
+            continue
+
+        try:
+            with field_file.open('rb') as f:
+                name = save_webp_variants(field_file.storage, f, webp_name(pending_name))
+        except (ImageTooLarge, Image.DecompressionBombError) as e:
+            # в обход валидации (bulk_create) попал слишком большой файл - не храним его
+            logger.warning('%s #%s: %s', model_label, obj.id, e)
+            name = ''
+
+        model.objects.filter(id=obj.id, **{field_name: pending_name}).update(**{field_name: name})
+        # в ContentAddressedStorage удаление отложено: тот же оригинал может ждать конвертации у другой записи
+        field_file.storage.delete(pending_name)
+
+
+@app.task
+def cleanup_orphan_media():
+    from utils.media import find_orphan_media
+
+    if not hasattr(default_storage, 'purge'):
+        return 0
+
+    orphans = find_orphan_media()
+    for name in orphans:
+        default_storage.purge(name)
+    logger.info('Удалено неиспользуемых файлов: %s', len(orphans))
+    return len(orphans)
+
+
+@app.task
+def cleanup_stale_uploads():
+    from utils.upload import cleanup_stale_uploads
+
+    removed = cleanup_stale_uploads(settings.CHUNKED_UPLOAD_EXPIRE_HOURS)
+    logger.info('Удалено брошенных загрузок: %s', removed)
+    return removed
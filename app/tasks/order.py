@@ -1,13 +1,16 @@
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Sum, F
+from django.utils import timezone
 
 from main_conf.celery import app
-from my_db.enums import QuantityStatus, CombinationStatus, NomStatus, NomUnit, NomType
+from tasks.base import IdempotentTask
+from utils.events import notify_stock
+from my_db.enums import QuantityStatus, CombinationStatus, NomStatus, NomUnit, NomType, OrderStatus
 from my_db.models import NomCount, Nomenclature, QuantityHistory, QuantityNomenclature, Quantity, StaffProfile, Order, \
     Consumable, WorkDetail
 
 
-@app.task
+@app.task(base=IdempotentTask, idempotency_args=('order_id',))
 def gp_move_in_warehouse(order_id, staff_id):
     order = Order.objects.get(id=order_id)
     staff = StaffProfile.objects.get(id=staff_id)
@@ -82,9 +85,10 @@ def gp_move_in_warehouse(order_id, staff_id):
 
         NomCount.objects.bulk_update(nom_count_updates, ['amount'])
         Nomenclature.objects.bulk_update(nomenclature_updates, ['cost_price', 'unit', 'type'])
+    notify_stock(quantity.in_warehouse_id, [item['product_id'] for item in data])
 
 
-@app.task
+@app.task(base=IdempotentTask, idempotency_args=('order_id',))
 def material_move_out_warehouse(order_id, staff_id):
     staff = StaffProfile.objects.get(id=staff_id)
     order = Order.objects.get(id=order_id)
@@ -131,4 +135,13 @@ def material_move_out_warehouse(order_id, staff_id):
                 ))
 
         QuantityNomenclature.objects.bulk_create(qn_objects)
+    notify_stock(out_warehouse.id if out_warehouse else None, [qn.nomenclature_id for qn in qn_objects])
 
+
+@app.task
+def mark_overdue_orders():
+    """Незавершённые заказы с прошедшим сроком -> "ПРОСРОЧЕН" одним UPDATE по индексу (status, deadline)."""
+    now = timezone.now()
+    return Order.objects.filter(
+        status__in=[OrderStatus.NEW, OrderStatus.PROGRESS], deadline__lt=now
+    ).update(status=OrderStatus.OVERDUE, overdue_at=now, status_before_overdue=F('status'))
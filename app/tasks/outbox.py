@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main_conf.celery import app
+from my_db.models import OutboxMessage
+from utils.outbox import dispatch
+
+
+@app.task
+def relay_outbox(keep_days=7):
+    """Страховка для utils.outbox: досылает то, что не ушло сразу после коммита (брокер был недоступен, процесс упал)."""
+    sent = dispatch()
+    OutboxMessage.objects.filter(sent_at__lt=timezone.now() - timedelta(days=keep_days)).delete()
+    return sent
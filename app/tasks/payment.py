@@ -0,0 +1,47 @@
+import datetime
+
+from main_conf.celery import app
+from my_db.enums import WorkStatus
+from my_db.models import WorkDetail
+from utils.payment import pay_salaries
+
+
+@app.task(bind=True)
+def salary_batch(self, date_from, date_until, staff_ids=None, chunk_size=50):
+    date_from = datetime.date.fromisoformat(date_from)
+    date_until = datetime.date.fromisoformat(date_until)
+
+    if not staff_ids:
+        staff_ids = list(
+            WorkDetail.objects.filter(
+                status=WorkStatus.NEW,
+                staff__isnull=False,
+                created_at__date__lte=date_until,
+            ).order_by('staff_id').values_list('staff_id', flat=True).distinct()
+        )
+
+    total = len(staff_ids)
+    processed = 0
+    payments_count = 0
+    amount = 0
+
+    for i in range(0, total, chunk_size):
+        chunk = staff_ids[i:i + chunk_size]
+        payments = pay_salaries(chunk, date_from, date_until)
+
+        processed += len(chunk)
+        payments_count += len(payments)
+        amount += sum(p.amount for p in payments)
+
+        self.update_state(state='PROGRESS', meta={
+            'processed': processed,
+            'total': total,
+            'payments': payments_count,
+        })
+
+    return {
+        'processed': processed,
+        'total': total,
+        'payments': payments_count,
+        'amount': str(amount),
+    }
@@ -1,9 +1,8 @@
-# from celery import shared_task
-# from django.db.models import Sum, F
-# from my_db.models import Nomenclature, Operation, Consumable, NomType
-# from django.utils import timezone
-# from decimal import Decimal
-#
-# @shared_task
-# def change_product_cost_price():
+from main_conf.celery import app
+from utils.costing import recalculate_product_costs
 
+
+@app.task
+def change_product_cost_price(material_ids=None):
+    """Себестоимость изделий по техкарте; material_ids - пересчитать только изделия с этими материалами."""
+    return len(recalculate_product_costs(material_ids=material_ids))
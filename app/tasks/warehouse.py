@@ -1,8 +1,16 @@
+from django.db import transaction
+from django.utils import timezone
+
 from main_conf.celery import app
-from my_db.models import Warehouse, NomCount, PartyConsumable
+from my_db.enums import ImportStatus
+from my_db.models import Warehouse, NomCount, PartyConsumable, ImportJob
+from tasks.base import IdempotentTask
+from utils.costing import recalculate_product_costs
+from utils.events import notify_stock
+from utils.material_import import read_rows, parse_row, get_color_map, upsert_materials, MAX_STORED_ERRORS
 
 
-@app.task
+@app.task(base=IdempotentTask)
 def write_off_from_warehouse(staff_id, consumables__ids):
     warehouse = Warehouse.objects.filter(staffs__id=staff_id).first()
     consumables = PartyConsumable.objects.filter(id__in=consumables__ids)
@@ -14,5 +22,45 @@ def write_off_from_warehouse(staff_id, consumables__ids):
         update_list.append(nom_count)
 
     NomCount.objects.bulk_update(update_list, ['amount'])
+    notify_stock(warehouse.id if warehouse else None, [c.nomenclature_id for c in update_list])
+
+
+@app.task
+def import_materials(job_id, chunk_size=500):
+    job = ImportJob.objects.get(id=job_id)
+    ImportJob.objects.filter(id=job_id).update(status=ImportStatus.PROGRESS)
+
+    colors = get_color_map()
+    progress = {'processed': 0, 'created': 0, 'updated': 0, 'errors': []}
+
+    def flush(chunk):
+        with transaction.atomic():
+            created, updated = upsert_materials(chunk)
+        progress['created'] += created
+        progress['updated'] += updated
+        ImportJob.objects.filter(id=job_id).update(**progress)
+
+    try:
+        with job.file.open('rb') as f:
+            chunk = []
+            for number, row in enumerate(read_rows(f.file, job.file.name), start=2):
+                progress['processed'] += 1
+                try:
+                    chunk.append(parse_row(row, colors))
+                except ValueError as e:
+                    if len(progress['errors']) < MAX_STORED_ERRORS:
+                        progress['errors'].append({'row': number, 'error': str(e)})
 
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk = []
+            if chunk:
+                flush(chunk)
+    except Exception as e:
+        progress['errors'].append({'row': None, 'error': str(e)})
+        ImportJob.objects.filter(id=job_id).update(status=ImportStatus.FAILED, finished_at=timezone.now(), **progress)
+        raise
 
+    ImportJob.objects.filter(id=job_id).update(status=ImportStatus.DONE, finished_at=timezone.now(), **progress)
+    if progress['updated']:
+        recalculate_product_costs()
@@ -0,0 +1,158 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from my_db.enums import NomType, NomUnit
+from my_db.models import Nomenclature, Rank, Operation, Combination, Consumable, Price
+from utils.combination import recalculate_combination_totals
+from utils.costing import recalculate_product_costs
+
+MATERIAL_PRICE_KEY = 'calculation:material:{}'
+RANKS_KEY = 'calculation:ranks'
+PRECISION = Decimal('0.001')
+
+
+def material_prices(ids):
+    """{id: (название, cost_price)} материалов: из кэша, недостающие - одним запросом."""
+    keys = {MATERIAL_PRICE_KEY.format(i): i for i in ids}
+    cached = cache.get_many(keys)
+    prices = {keys[key]: value for key, value in cached.items()}
+    missing = [i for i in ids if i not in prices]
+    if missing:
+        loaded = {
+            nomenclature_id: (title, cost_price) for nomenclature_id, title, cost_price in
+            Nomenclature.objects.filter(id__in=missing).values_list('id', 'title', 'cost_price')
+        }
+        cache.set_many({MATERIAL_PRICE_KEY.format(i): value for i, value in loaded.items()},
+                       settings.CALCULATION_PRICE_CACHE_SECONDS)
+        prices.update(loaded)
+    return prices
+
+
+def rank_percents():
+    """{id: (название, процент надбавки)} всех разрядов, кэшируется целиком."""
+    ranks = cache.get(RANKS_KEY)
+    if ranks is None:
+        ranks = {rank_id: (title, percent) for rank_id, title, percent in
+                 Rank.objects.values_list('id', 'title', 'percent')}
+        cache.set(RANKS_KEY, ranks, settings.CALCULATION_PRICE_CACHE_SECONDS)
+    return ranks
+
+
+def compute_calculation(data):
+    """
+    Себестоимость черновика калькуляции без записи в БД, по той же формуле, что utils/costing:
+    сырьё (расход x текущая цена материала, для строк без материала - цена из черновика)
+    + операции (цена с надбавкой разряда) + дополнительные расходы.
+    data - validated_data CalculationComputeSerializer. Цены материалов и разряды берутся из кэша
+    (CALCULATION_PRICE_CACHE_SECONDS), поэтому повторный пересчёт обычно обходится без запросов.
+    """
+    consumables = data.get('cal_consumables', [])
+    prices = material_prices({item['nomenclature'] for item in consumables if item.get('nomenclature')})
+    ranks = rank_percents()
+
+    materials = []
+    materials_total = Decimal(0)
+    for item in consumables:
+        title, price = prices.get(item.get('nomenclature'), (item.get('title', ''), item.get('price') or 0))
+        cost = item['consumption'] * price
+        materials_total += cost
+        materials.append({
+            'nomenclature': item.get('nomenclature'),
+            'title': title,
+            'consumption': item['consumption'],
+            'price': price,
+            'draft_price': item.get('price'),
+            'cost': cost.quantize(PRECISION),
+        })
+
+    labor = {}
+    labor_total = Decimal(0)
+    time = 0
+    for combination in data.get('combinations', []):
+        for operation in combination.get('operations', []):
+            rank_title, percent = ranks.get(operation.get('rank'), (None, Decimal(0)))
+            cost = (operation.get('price') or 0) * (1 + percent / 100)
+            row = labor.setdefault(operation.get('rank'), {
+                'rank': operation.get('rank'), 'title': rank_title, 'percent': percent,
+                'operations': 0, 'time': 0, 'cost': Decimal(0),
+            })
+            row['operations'] += 1
+            row['time'] += operation.get('time', 0)
+            row['cost'] += cost
+            labor_total += cost
+            time += operation.get('time', 0)
+    for row in labor.values():
+        row['cost'] = row['cost'].quantize(PRECISION)
+
+    overhead_total = sum((item['price'] for item in data.get('cal_prices', [])), Decimal(0))
+
+    cost_price = (materials_total + labor_total + overhead_total).quantize(PRECISION)
+    count = data.get('count') or 1
+    price = data.get('price')
+    return {
+        'materials': materials,
+        'labor': list(labor.values()),
+        'overhead': [{'title': item['title'], 'price': item['price']} for item in data.get('cal_prices', [])],
+        'totals': {
+            'materials': materials_total.quantize(PRECISION),
+            'labor': labor_total.quantize(PRECISION),
+            'overhead': overhead_total.quantize(PRECISION),
+            'cost_price': cost_price,
+            'time': time,  # secs на единицу
+            'count': count,
+            'total_cost': cost_price * count,
+            'margin': (price - cost_price) if price is not None else None,
+            'margin_percent': round((price - cost_price) / price * 100, 1) if price else None,
+        },
+    }
+
+
+def promote_calculation(calculation):
+    """
+    Создаёт ГП по калькуляции: операции, комбинации, связи комбинация-операция, расход сырья и цены
+    вставляются пачками, затем пересчитываются суммы комбинаций и себестоимость, калькуляция привязывается к ГП.
+    Вызывается внутри transaction.atomic с заблокированной калькуляцией.
+    """
+    combinations = list(calculation.combinations.prefetch_related('operations'))
+
+    nomenclature = Nomenclature.objects.create(
+        title=calculation.title, vendor_code=calculation.vendor_code, type=NomType.GP, unit=NomUnit.U,
+    )
+
+    operations = []
+    for combination in combinations:
+        for cal_operation in combination.operations.all():
+            operations.append((combination, Operation(
+                nomenclature=nomenclature, title=cal_operation.title, time=cal_operation.time,
+                price=cal_operation.price or 0, equipment_id=cal_operation.equipment_id,
+                rank_id=cal_operation.rank_id,
+            )))
+    Operation.objects.bulk_create([operation for _, operation in operations])
+
+    created = dict(zip(combinations, Combination.objects.bulk_create([
+        Combination(nomenclature=nomenclature, title=combination.title, status=combination.status)
+        for combination in combinations
+    ])))
+    Combination.operations.through.objects.bulk_create([
+        Combination.operations.through(combination=created[combination], operation=operation)
+        for combination, operation in operations
+    ])
+    recalculate_combination_totals([combination.id for combination in created.values()])
+
+    Consumable.objects.bulk_create([
+        Consumable(nomenclature=nomenclature, material_nomenclature_id=consumable.nomenclature_id,
+                   consumption=consumable.consumption, unit=consumable.unit, price=consumable.price)
+        for consumable in calculation.cal_consumables.all()
+    ])
+    Price.objects.bulk_create([
+        Price(nomenclature=nomenclature, title=price.title, price=price.price)
+        for price in calculation.cal_prices.all()
+    ])
+    recalculate_product_costs(nomenclature_ids=[nomenclature.id])
+
+    calculation.nomenclature = nomenclature
+    calculation.save(update_fields=['nomenclature'])
+    nomenclature.refresh_from_db(fields=['cost_price'])
+    return nomenclature
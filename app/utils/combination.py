@@ -0,0 +1,19 @@
+from django.db.models import Sum, OuterRef, Subquery, Value, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+
+from my_db.models import Combination, Operation
+
+
+def recalculate_combination_totals(combination_ids=None):
+    operations = Operation.objects.filter(combinations=OuterRef('pk')).order_by().values('combinations')
+    price_subquery = operations.annotate(total=Sum('price')).values('total')
+    time_subquery = operations.annotate(total=Sum('time')).values('total')
+
+    queryset = Combination.objects.all()
+    if combination_ids is not None:
+        queryset = queryset.filter(id__in=combination_ids)
+
+    return queryset.update(
+        total_price=Coalesce(Subquery(price_subquery), Value(0), output_field=DecimalField()),
+        total_time=Coalesce(Subquery(time_subquery), Value(0), output_field=IntegerField()),
+    )
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.db.models import Sum, F, OuterRef, Subquery, Exists, Value, DecimalField
+from django.db.models.functions import Coalesce
+
+from my_db.enums import NomType
+from my_db.models import Nomenclature, Consumable, Operation, Price
+
+# типы номенклатуры, у которых есть техкарта (сырьё, операции, доп. расходы)
+COSTED_TYPES = [NomType.PF_1, NomType.PF_2, NomType.GP, NomType.ORDER]
+
+# полуфабрикаты могут входить в техкарту других изделий: столько уровней пересчитывается каскадом
+MAX_BOM_DEPTH = 5
+
+MONEY = DecimalField(max_digits=12, decimal_places=3)
+ZERO = Value(Decimal(0), output_field=MONEY)
+
+
+def _total(queryset, expression):
+    """Подзапрос суммы expression по строкам техкарты номенклатуры OuterRef('pk')."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(nomenclature=OuterRef('pk')).order_by().values('nomenclature')
+            .annotate(total=Sum(expression, output_field=MONEY)).values('total'),
+            output_field=MONEY,
+        ),
+        ZERO,
+        output_field=MONEY,
+    )
+
+
+def cost_price_expression():
+    """
+    Себестоимость единицы: сырьё (расход x cost_price материала)
+    + операции (цена с надбавкой разряда Rank.percent) + дополнительные расходы (Price).
+    """
+    materials = _total(Consumable.objects.all(), F('consumption') * F('material_nomenclature__cost_price'))
+    # умножение, а не деление на 100: в SQLite целое / целое - целочисленное деление
+    rank_factor = 1 + Coalesce(F('rank__percent'), ZERO, output_field=MONEY) * Value(Decimal('0.01'), output_field=MONEY)
+    operations = _total(Operation.objects.filter(is_active=True), F('price') * rank_factor)
+    prices = _total(Price.objects.all(), F('price'))
+    return materials + operations + prices
+
+
+def costed_products():
+    """Изделия с техкартой. Изделия без неё не трогаются: их себестоимость ведётся средневзвешенной при приходе."""
+    return Nomenclature.objects.filter(type__in=COSTED_TYPES).filter(
+        Exists(Consumable.objects.filter(nomenclature=OuterRef('pk')))
+        | Exists(Operation.objects.filter(nomenclature=OuterRef('pk'), is_active=True))
+        | Exists(Price.objects.filter(nomenclature=OuterRef('pk')))
+    )
+
+
+def using_materials(queryset, material_ids):
+    return queryset.filter(
+        Exists(Consumable.objects.filter(nomenclature=OuterRef('pk'), material_nomenclature_id__in=material_ids))
+    )
+
+
+def recalculate_product_costs(nomenclature_ids=None, material_ids=None):
+    """
+    Пересчитывает Nomenclature.cost_price изделий по техкарте: UPDATE с подзапросами на уровень техкарты.
+    nomenclature_ids - только эти изделия, material_ids - только изделия, в техкарте которых есть эти материалы
+    (после изменения цены сырья). Затем каскадом пересчитываются изделия, в которые входят пересчитанные
+    полуфабрикаты. Возвращает id пересчитанных изделий.
+    """
+    queryset = costed_products()
+    if nomenclature_ids is not None:
+        queryset = queryset.filter(id__in=nomenclature_ids)
+    if material_ids is not None:
+        queryset = using_materials(queryset, material_ids)
+
+    level = set(queryset.values_list('id', flat=True))
+    updated = set()
+    for _ in range(MAX_BOM_DEPTH):
+        if not level:
+            break
+        Nomenclature.objects.filter(id__in=level).update(cost_price=cost_price_expression())
+        updated |= level
+        level = set(using_materials(costed_products(), level).values_list('id', flat=True))
+    return updated
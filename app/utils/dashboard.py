@@ -0,0 +1,112 @@
+import asyncio
+
+from django.db.models import Sum, Count, F, Q
+
+from my_db.enums import PaymentStatus
+from my_db.models import Plan, OrderProduct, Work, Payment, EquipmentService, EquipmentUsage
+
+
+def statistic_queries(month):
+    """Запросы статистики за месяц: имя -> (queryset, агрегаты). Общие для sync и async версий."""
+    work_qs = Work.objects.filter(created_at__month=month)
+    staffs = work_qs.values('details__staff').distinct()
+
+    return {
+        'orders': (
+            OrderProduct.objects.filter(order__created_at__month=month),
+            dict(
+                income=Sum('true_price'),
+                consumption=Sum(F('true_cost_price')),
+                orders=Count('order_id', distinct=True),
+                produced=Sum('amounts__amount'),  # Количество произведённых товаров
+            )
+        ),
+        'operations': (
+            work_qs,
+            dict(
+                performance=Sum('details__amount'),
+                time=Sum(F('details__amount') * F('details__combination__total_time')),
+            )
+        ),
+        'payments': (
+            Payment.objects.filter(staff__in=staffs, created_at__month=month),
+            dict(
+                fine=Sum('amount', filter=Q(status__in=[
+                    PaymentStatus.FINE, PaymentStatus.FINE_CHECKED
+                ])),  # Общая сумма штрафов
+                done=Sum('amount', filter=Q(status__in=[
+                    PaymentStatus.SALARY,
+                    PaymentStatus.ADVANCE,
+                    PaymentStatus.ADVANCE_CHECKED,
+                ])),  # Общая сумма заработка
+            )
+        ),
+        'staffs': (
+            work_qs,
+            dict(count=Count('details__staff', distinct=True))
+        ),
+        'services': (
+            EquipmentService.objects.filter(created_at__month=month),
+            dict(service_cost=Sum('price'))  # Суммарные расходы на обслуживание
+        ),
+        'machine': (
+            EquipmentUsage.objects.filter(date__month=month),
+            dict(total_time=Sum('seconds'))  # Общее время работы оборудования (пересчитывается ночью)
+        ),
+    }
+
+
+def build_statistic(plan, results):
+    aggregation = results['orders']
+    income = aggregation.get('income') or 0
+    consumption = aggregation.get('consumption') or 0
+    profit = income - consumption
+
+    operations_aggregation = results['operations']
+    payments_aggregation = results['payments']
+    staff_count = results['staffs']['count']
+    avg_performance = operations_aggregation['performance'] / staff_count if staff_count > 0 else 0
+
+    return {
+        "order": {
+            "plan": {
+                "income": plan.income_amount if plan else 0,  # доход
+                "orders": plan.order_amount if plan else 0  # количество заказов
+            },
+            "fact": {
+                "income": income,  # доход
+                "consumption": consumption,  # расход
+                "profit": profit,  # прибыль
+                "orders": aggregation.get('orders') or 0  # количество заказов
+            }
+        },
+        "staff": {
+            "avg_performance": avg_performance or 0,  # Средняя производительность
+            "performance": operations_aggregation['performance'] or 0,  # Количество операций
+            "fine": payments_aggregation['fine'] or 0,  # Сумма штрафов
+            "done": payments_aggregation['done'] or 0,  # Сумма заработка
+            "time": operations_aggregation['time'] or 0,  # Общее время работы
+        },
+        "product": {
+            "produced": aggregation.get('produced') or 0,  # сколько товаров создано
+        },
+        "machine": {
+            "time": results['machine']['total_time'] or 0,  # сколько по времени работала машина,
+            "service": results['services']['service_cost'] or 0  # сколько по деньгам ушло на тех обслуживание
+        }
+    }
+
+
+def get_statistic(month):
+    plan = Plan.objects.filter(date__month=month).first()
+    results = {name: qs.aggregate(**aggregates) for name, (qs, aggregates) in statistic_queries(month).items()}
+    return build_statistic(plan, results)
+
+
+async def aget_statistic(month):
+    queries = statistic_queries(month)
+    plan, *values = await asyncio.gather(
+        Plan.objects.filter(date__month=month).afirst(),
+        *(qs.aaggregate(**aggregates) for qs, aggregates in queries.values())
+    )
+    return build_statistic(plan, dict(zip(queries, values)))
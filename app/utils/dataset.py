@@ -0,0 +1,251 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from my_db.enums import UserStatus, StaffRole, NomType, NomUnit, CombinationStatus, OrderStatus, QuantityStatus, \
+    PaymentStatus, WorkStatus, PartyStatus
+from my_db.models import MyUser, StaffProfile, ClientProfile, Rank, Size, Color, Nomenclature, Combination, \
+    Equipment, Operation, Consumable, Price, Warehouse, Quantity, QuantityNomenclature, QuantityHistory, NomCount, \
+    Order, OrderProduct, OrderProductAmount, Party, PartyDetail, PartyConsumable, Work, WorkDetail, Payment, Plan
+from utils.combination import recalculate_combination_totals
+
+# объёмы при scale=1; все, кроме справочников, умножаются на scale
+VOLUMES = {
+    'seamstresses': 20,
+    'cutters': 2,
+    'otk': 3,
+    'clients': 20,
+    'materials': 150,
+    'products': 40,
+    'orders': 150,
+    'movements': 300,
+}
+WAREHOUSES = 3
+EQUIPMENT = 15
+OPERATIONS_PER_PRODUCT = 10
+COMBINATION_STATUSES = [CombinationStatus.CUT, CombinationStatus.ZERO, CombinationStatus.OTK, CombinationStatus.DONE]
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+COLORS = ['Черный', 'Белый', 'Серый', 'Синий', 'Красный', 'Зеленый', 'Бежевый', 'Хаки']
+
+
+def create_users(prefix, role, count, status=UserStatus.STAFF):
+    users = MyUser.objects.bulk_create([
+        MyUser(username=f'{prefix}_{role}_{i}', status=status, password='!') for i in range(count)
+    ])
+    return users
+
+
+def create_staff(prefix, role, count, ranks, rnd):
+    users = create_users(prefix, StaffRole(role).name.lower(), count)
+    return StaffProfile.objects.bulk_create([
+        StaffProfile(user=user, role=role, name=f'{StaffRole(role).label.title()} {i}', surname=f'Тестов {i}',
+                     phone=f'+996700{i:06d}', rank=rnd.choice(ranks), salary=rnd.randint(20, 60) * 1000)
+        for i, user in enumerate(users)
+    ])
+
+
+@transaction.atomic
+def generate_dataset(prefix='bench', scale=1, seed=1):
+    """
+    Заполняет БД связанными данными швейного производства: сотрудники, клиенты, сырьё и ГП с комбинациями
+    и операциями, заказы с сеткой размер/цвет, партии, работы, оплаты и перемещения по складам.
+    Всё создаётся bulk_create; логины пользователей начинаются с prefix. Возвращает {модель: количество}.
+    """
+    rnd = random.Random(seed)
+    volumes = {key: max(1, int(value * scale)) for key, value in VOLUMES.items()}
+    now = timezone.now()
+
+    # справочники
+    ranks = Rank.objects.bulk_create([Rank(title=f'{prefix} разряд {i}', percent=i * 5) for i in range(1, 4)])
+    sizes = Size.objects.bulk_create([Size(title=title) for title in SIZES])
+    colors = Color.objects.bulk_create([Color(title=title, code=f'#{i:06x}') for i, title in enumerate(COLORS)])
+    equipment = Equipment.objects.bulk_create([
+        Equipment(title=f'Машина {i}', price=rnd.randint(50, 500) * 1000, is_active=True) for i in range(EQUIPMENT)
+    ])
+
+    # сотрудники и склады
+    director = create_staff(prefix, StaffRole.DIRECTOR, 1, ranks, rnd)[0]
+    create_staff(prefix, StaffRole.TECHNOLOGIST, 1, ranks, rnd)
+    managers = create_staff(prefix, StaffRole.WAREHOUSE, WAREHOUSES, ranks, rnd)
+    cutters = create_staff(prefix, StaffRole.CUTTER, volumes['cutters'], ranks, rnd)
+    seamstresses = create_staff(prefix, StaffRole.SEAMSTRESS, volumes['seamstresses'], ranks, rnd)
+    create_staff(prefix, StaffRole.OTK, volumes['otk'], ranks, rnd)
+
+    warehouses = Warehouse.objects.bulk_create([
+        Warehouse(title=f'{prefix} склад {i}', address=f'ул. Складская, {i}') for i in range(WAREHOUSES)
+    ])
+    Warehouse.staffs.through.objects.bulk_create([
+        Warehouse.staffs.through(warehouse=warehouse, staffprofile=manager)
+        for warehouse, manager in zip(warehouses, managers)
+    ])
+
+    clients = ClientProfile.objects.bulk_create([
+        ClientProfile(user=user, name=f'Клиент {i}', company_title=f'ОсОО {prefix} {i}', phone=f'+996555{i:06d}')
+        for i, user in enumerate(create_users(prefix, 'client', volumes['clients'], status=UserStatus.CLIENT))
+    ])
+
+    # сырьё и остатки
+    materials = Nomenclature.objects.bulk_create([
+        Nomenclature(title=f'Ткань {i}', vendor_code=f'{prefix}-M{i}', type=NomType.MATERIAL,
+                     unit=rnd.choice([NomUnit.M, NomUnit.U, NomUnit.R]), color=rnd.choice(colors),
+                     cost_price=Decimal(rnd.randint(50, 900)))
+        for i in range(volumes['materials'])
+    ])
+    NomCount.objects.bulk_create([
+        NomCount(warehouse=warehouse, nomenclature=material, amount=rnd.randint(100, 5000))
+        for warehouse in warehouses for material in materials
+    ])
+
+    # ГП: операции, комбинации, расход сырья, цены
+    products = Nomenclature.objects.bulk_create([
+        Nomenclature(title=f'Изделие {i}', vendor_code=f'{prefix}-GP{i}', type=NomType.GP, unit=NomUnit.U)
+        for i in range(volumes['products'])
+    ])
+    operations = Operation.objects.bulk_create([
+        Operation(title=f'Операция {i}', nomenclature=product, time=rnd.randint(30, 600),
+                  price=Decimal(rnd.randint(5, 80)), equipment=rnd.choice(equipment), rank=rnd.choice(ranks))
+        for product in products for i in range(OPERATIONS_PER_PRODUCT)
+    ])
+    combinations = Combination.objects.bulk_create([
+        Combination(title=f'{status.label.title()} {product.vendor_code}', nomenclature=product, status=status)
+        for product in products for status in COMBINATION_STATUSES
+    ])
+    product_combinations = {}
+    for combination in combinations:
+        product_combinations.setdefault(combination.nomenclature_id, []).append(combination)
+
+    links = []
+    for i, operation in enumerate(operations):
+        product_id = operation.nomenclature_id
+        combination = product_combinations[product_id][i % OPERATIONS_PER_PRODUCT % len(COMBINATION_STATUSES)]
+        links.append(Combination.operations.through(combination=combination, operation=operation))
+    Combination.operations.through.objects.bulk_create(links)
+    recalculate_combination_totals([combination.id for combination in combinations])
+
+    Consumable.objects.bulk_create([
+        Consumable(nomenclature=product, material_nomenclature=material, consumption=Decimal(rnd.randint(1, 30)) / 10,
+                   unit=material.unit, price=material.cost_price)
+        for product in products for material in rnd.sample(materials, min(4, len(materials)))
+    ])
+    Price.objects.bulk_create([
+        Price(nomenclature=product, title=title, price=rnd.randint(1, 20) * 10)
+        for product in products for title in ['Упаковка', 'Логистика']
+    ])
+    product_prices = {product.id: Decimal(rnd.randint(400, 3000)) for product in products}
+
+    # заказы с сеткой размер/цвет
+    orders = Order.objects.bulk_create([
+        Order(client=rnd.choice(clients), status=rnd.choice(OrderStatus.values),
+              deadline=now + timedelta(days=rnd.randint(-30, 60)),
+              in_warehouse=warehouses[0], out_warehouse=rnd.choice(warehouses))
+        for _ in range(volumes['orders'])
+    ])
+    order_products = OrderProduct.objects.bulk_create([
+        OrderProduct(order=order, nomenclature=product, price=product_prices[product.id],
+                     true_price=product_prices[product.id], cost_price=product_prices[product.id] * Decimal('0.6'),
+                     true_cost_price=product_prices[product.id] * Decimal('0.65'))
+        for order in orders for product in rnd.sample(products, min(rnd.randint(1, 3), len(products)))
+    ])
+    grids = {order_product.id: (rnd.sample(sizes, 3), rnd.sample(colors, 2)) for order_product in order_products}
+    amounts = OrderProductAmount.objects.bulk_create([
+        OrderProductAmount(order_product=order_product, size=size, color=color, amount=rnd.randint(10, 100),
+                           defect=rnd.randint(0, 3))
+        for order_product in order_products
+        for size in grids[order_product.id][0] for color in grids[order_product.id][1]
+    ])
+
+    # партии по 70% позиций заказов, работы по каждой комбинации
+    parties_products = [order_product for order_product in order_products if rnd.random() < 0.7]
+    parties = Party.objects.bulk_create([
+        Party(order_id=order_product.order_id, nomenclature_id=order_product.nomenclature_id,
+              staff=rnd.choice(cutters), number=f'{prefix}-{i}', status=rnd.choice(PartyStatus.values))
+        for i, order_product in enumerate(parties_products)
+    ])
+    amounts_by_product = {}
+    for amount in amounts:
+        amounts_by_product.setdefault(amount.order_product_id, []).append(amount)
+
+    details = []
+    party_cells = []
+    for party, order_product in zip(parties, parties_products):
+        for amount in amounts_by_product[order_product.id]:
+            details.append(PartyDetail(party=party, size_id=amount.size_id, color_id=amount.color_id,
+                                       plan_amount=amount.amount, true_amount=amount.amount - rnd.randint(0, 3)))
+            party_cells.append((party, amount))
+    PartyDetail.objects.bulk_create(details)
+
+    product_materials = {}
+    for consumable in Consumable.objects.filter(nomenclature__in=products):
+        product_materials.setdefault(consumable.nomenclature_id, []).append(consumable.material_nomenclature_id)
+    PartyConsumable.objects.bulk_create([
+        PartyConsumable(party=party, nomenclature_id=material_id, is_main=i == 0, layers_count=rnd.randint(10, 60),
+                        table_length=rnd.randint(3, 12), fact_length=rnd.randint(3, 12), quantity=rnd.randint(10, 100))
+        for party in parties for i, material_id in enumerate(product_materials[party.nomenclature_id][:2])
+    ])
+
+    works = Work.objects.bulk_create([
+        Work(staff=rnd.choice(seamstresses), party=party, color_id=amount.color_id, size_id=amount.size_id)
+        for party, amount in party_cells
+    ])
+    work_details = WorkDetail.objects.bulk_create([
+        WorkDetail(work=work, staff=work.staff, combination=combination,
+                   amount=rnd.randint(0, amount.amount), status=WorkStatus.NEW)
+        for work, (party, amount) in zip(works, party_cells)
+        for combination in product_combinations[party.nomenclature_id]
+    ])
+
+    # оплаты: половина выполненных работ уже оплачена
+    payments = Payment.objects.bulk_create([
+        Payment(staff=staff, status=status, amount=rnd.randint(1, 30) * 1000,
+                date_from=(now - timedelta(days=30)).date(), date_until=now.date())
+        for staff in seamstresses for status in [PaymentStatus.SALARY, PaymentStatus.ADVANCE, PaymentStatus.BONUS]
+    ])
+    staff_payments = {payment.staff_id: payment for payment in payments if payment.status == PaymentStatus.SALARY}
+    paid = [detail for detail in work_details if rnd.random() < 0.5]
+    for detail in paid:
+        detail.status = WorkStatus.PAID
+        detail.payment = staff_payments[detail.staff_id]
+    WorkDetail.objects.bulk_update(paid, ['status', 'payment'], batch_size=1000)
+
+    # перемещения и списания по складам
+    movement_statuses = [QuantityStatus.PROGRESSING, QuantityStatus.ACTIVE, QuantityStatus.INACTIVE,
+                         QuantityStatus.WRITE_OF, QuantityStatus.DEFECT]
+    quantities = []
+    for _ in range(volumes['movements']):
+        in_warehouse, out_warehouse = rnd.sample(warehouses, 2)
+        quantities.append(Quantity(in_warehouse=in_warehouse, out_warehouse=out_warehouse,
+                                   status=rnd.choice(movement_statuses), order=rnd.choice(orders)))
+    quantities = Quantity.objects.bulk_create(quantities)
+    QuantityNomenclature.objects.bulk_create([
+        QuantityNomenclature(quantity=quantity, nomenclature=material, amount=rnd.randint(1, 200),
+                             price=material.cost_price)
+        for quantity in quantities for material in rnd.sample(materials, min(rnd.randint(1, 5), len(materials)))
+    ])
+    manager_by_warehouse = dict(zip([warehouse.id for warehouse in warehouses], managers))
+    QuantityHistory.objects.bulk_create([
+        QuantityHistory(quantity=quantity, staff_id=manager.id, staff_name=manager.name,
+                        staff_surname=manager.surname, status=quantity.status)
+        for quantity in quantities for manager in [manager_by_warehouse[quantity.out_warehouse_id]]
+    ])
+
+    Plan.objects.create(income_amount=5_000_000 * scale, order_amount=volumes['orders'], date=now.date())
+
+    return {
+        'staff': StaffProfile.objects.filter(user__username__startswith=f'{prefix}_').count(),
+        'clients': len(clients),
+        'materials': len(materials),
+        'products': len(products),
+        'operations': len(operations),
+        'combinations': len(combinations),
+        'orders': len(orders),
+        'order_amounts': len(amounts),
+        'parties': len(parties),
+        'work_details': len(work_details),
+        'payments': len(payments),
+        'movements': len(quantities),
+        'director': director.user.username,
+        'warehouse_manager': managers[0].user.username,
+    }
@@ -0,0 +1,105 @@
+import datetime
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, F, Count, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from my_db.models import Equipment, EquipmentService, EquipmentUsage, WorkDetail
+
+
+def usage_by_day(date_from, date_to):
+    """
+    Машинное время по дням: для каждой выполненной работы (WorkDetail) - количество x время каждой операции
+    её комбинации, привязанной к оборудованию. Одна строка на (оборудование, день), даты включительно.
+    """
+    return (
+        WorkDetail.objects.filter(
+            created_at__date__gte=date_from,
+            created_at__date__lte=date_to,
+            combination__operations__equipment__isnull=False,
+            amount__gt=0,
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('combination__operations__equipment_id', 'day')
+        .annotate(seconds=Sum(F('amount') * F('combination__operations__time')), operations=Sum('amount'))
+        .order_by()
+    )
+
+
+@transaction.atomic
+def refresh_equipment_usage(date_from, date_to):
+    """Пересчитывает EquipmentUsage за период: старые строки периода заменяются новыми одной транзакцией."""
+    rows = [
+        EquipmentUsage(equipment_id=row['combination__operations__equipment_id'], date=row['day'],
+                       seconds=row['seconds'] or 0, operations=row['operations'] or 0)
+        for row in usage_by_day(date_from, date_to)
+    ]
+    EquipmentUsage.objects.filter(date__gte=date_from, date__lte=date_to).delete()
+    EquipmentUsage.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def equipment_utilization(date_from, date_to):
+    """
+    Загрузка оборудования за период из EquipmentUsage: часы по дням, доля от рабочего времени
+    (SCHEDULE_WORKDAY_HOURS в рабочие дни SCHEDULE_WEEKMASK), затраты на обслуживание за период,
+    стоимость обслуживания на машино-час, сроки обслуживания и гарантии.
+    """
+    today = timezone.localdate()
+    work_days = int(np.busday_count(date_from, date_to + datetime.timedelta(days=1),
+                                    weekmask=settings.SCHEDULE_WEEKMASK))
+    available = work_days * settings.SCHEDULE_WORKDAY_HOURS * 3600
+
+    days = defaultdict(list)
+    for equipment_id, date, seconds in (
+        EquipmentUsage.objects.filter(date__gte=date_from, date__lte=date_to)
+        .order_by('date').values_list('equipment_id', 'date', 'seconds')
+    ):
+        days[equipment_id].append({'date': date, 'hours': round(seconds / 3600, 2)})
+
+    period = Q(usages__date__gte=date_from, usages__date__lte=date_to)
+    equipment = (
+        Equipment.objects.all()
+        .annotate(period_seconds=Sum('usages__seconds', filter=period),
+                  period_operations=Sum('usages__operations', filter=period))
+        .order_by('id')
+    )
+    services = {
+        row['equipment_id']: row for row in
+        EquipmentService.objects.filter(created_at__date__gte=date_from, created_at__date__lte=date_to)
+        .values('equipment_id').annotate(cost=Sum('price'), count=Count('id')).order_by()
+    }
+    last_services = dict(
+        EquipmentService.objects.values('equipment_id').annotate(last=Max('created_at'))
+        .order_by().values_list('equipment_id', 'last')
+    )
+
+    result = []
+    for item in equipment:
+        seconds = item.period_seconds or 0
+        hours = seconds / 3600
+        service = services.get(item.id, {})
+        cost = service.get('cost') or 0
+        result.append({
+            'id': item.id,
+            'title': item.title,
+            'is_active': item.is_active,
+            'hours': round(hours, 1),
+            'operations': item.period_operations or 0,
+            'utilization': round(seconds / available * 100, 1) if available else 0,  # % рабочего времени
+            'service_cost': cost,
+            'service_count': service.get('count') or 0,
+            'service_cost_per_hour': round(cost / hours, 2) if hours else None,
+            'last_service': last_services.get(item.id),
+            'service_date': item.service_date,
+            'service_due': bool(item.service_date and item.service_date <= today),
+            'guarantee': item.guarantee,
+            'in_guarantee': bool(item.guarantee and item.guarantee >= today),
+            'days': days.get(item.id, []),
+        })
+    return {'from_date': date_from, 'to_date': date_to, 'work_days': work_days, 'equipment': result}
+
@@ -0,0 +1,98 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import Sum
+
+from my_db.enums import QuantityStatus
+from my_db.models import NomCount, WorkDetail
+
+logger = logging.getLogger(__name__)
+
+# статусы перемещений, о которых сообщается складам
+QUANTITY_EVENT_STATUSES = (QuantityStatus.PROGRESSING, QuantityStatus.ACTIVE)
+
+
+def warehouse_group(warehouse_id):
+    return f'warehouse_{warehouse_id}'
+
+
+def order_group(order_id):
+    return f'order_{order_id}'
+
+
+def send_event(group, event, build_data):
+    """
+    Отправляет событие подписчикам группы после коммита транзакции.
+    build_data вызывается уже после коммита - данные события читаются свежими.
+    Недоступность Redis не должна ронять запрос, поэтому ошибки только логируются.
+    """
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(
+                group, {'type': 'event.message', 'event': event, 'data': build_data()}
+            )
+        except Exception:
+            logger.exception('Не удалось отправить событие %s в %s', event, group)
+
+    transaction.on_commit(send)
+
+
+def notify_quantity(quantity):
+    if int(quantity.status) not in QUANTITY_EVENT_STATUSES:
+        return
+
+    def build_data():
+        return {
+            'id': quantity.id,
+            'status': int(quantity.status),
+            'in_warehouse': quantity.in_warehouse_id,
+            'out_warehouse': quantity.out_warehouse_id,
+        }
+
+    for warehouse_id in {quantity.in_warehouse_id, quantity.out_warehouse_id} - {None}:
+        send_event(warehouse_group(warehouse_id), 'quantity', build_data)
+
+
+def notify_stock(warehouse_id, nomenclature_ids):
+    if not warehouse_id:
+        return
+    nomenclature_ids = list(set(nomenclature_ids))
+
+    def build_data():
+        counts = NomCount.objects.filter(warehouse_id=warehouse_id, nomenclature_id__in=nomenclature_ids)
+        return {
+            'warehouse': warehouse_id,
+            'counts': [
+                {'nomenclature': nomenclature_id, 'amount': str(amount)}  # как DecimalField в DRF
+                for nomenclature_id, amount in counts.values_list('nomenclature_id', 'amount')
+            ],
+        }
+
+    send_event(warehouse_group(warehouse_id), 'stock', build_data)
+
+
+def notify_order_progress(order_id):
+    if not order_id:
+        return
+
+    def build_data():
+        totals = (
+            WorkDetail.objects.filter(work__party__order_id=order_id)
+            .values('combination_id', 'combination__title')
+            .annotate(amount=Sum('amount'))
+            .order_by('combination_id')
+        )
+        return {
+            'order': order_id,
+            'combinations': [
+                {'id': row['combination_id'], 'title': row['combination__title'], 'amount': row['amount']}
+                for row in totals
+            ],
+        }
+
+    send_event(order_group(order_id), 'work', build_data)
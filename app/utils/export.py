@@ -0,0 +1,26 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи в файл."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield '\ufeff'  # BOM, чтобы Excel правильно открыл кириллицу
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
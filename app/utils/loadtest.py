@@ -0,0 +1,75 @@
+import asyncio
+import statistics
+import time
+from collections import namedtuple
+
+import httpx
+
+# delay - через сколько секунд от начала отправить (для воспроизведения журнала с исходными интервалами),
+# label - ключ группировки в отчёте, по умолчанию путь
+LoadRequest = namedtuple('LoadRequest', ['method', 'path', 'body', 'headers', 'label', 'delay'],
+                         defaults=[None, None, None, None])
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'mean': round(statistics.mean(latencies) * 1000, 1) if latencies else 0,
+        'p50': round(percentile(latencies, 50) * 1000, 1),
+        'p95': round(percentile(latencies, 95) * 1000, 1),
+        'p99': round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def run_load(base_url, requests, concurrency, headers=None, timeout=60):
+    """
+    Отправляет requests (LoadRequest или кортежи (method, path, body)) с concurrency одновременными соединениями.
+    Возвращает {label: сводка} с задержками в мс; ответы 4xx/5xx и таймауты считаются ошибками.
+    """
+    queue = asyncio.Queue()
+    for request in sorted((LoadRequest(*request) for request in requests), key=lambda r: r.delay or 0):
+        queue.put_nowait(request)
+
+    latencies = {}
+    errors = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=timeout) as client:
+        async def worker():
+            while not queue.empty():
+                request = queue.get_nowait()
+                if request.delay:
+                    await asyncio.sleep(started + request.delay - time.perf_counter())
+                label = request.label or request.path
+                start = time.perf_counter()
+                try:
+                    response = await client.request(request.method, request.path, content=request.body,
+                                                    headers=request.headers)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.setdefault(label, []).append(time.perf_counter() - start)
+                else:
+                    errors[label] = errors.get(label, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    paths = set(latencies) | set(errors)
+    report = {path: summarize(latencies.get(path, []), errors.get(path, 0), elapsed) for path in sorted(paths)}
+    report['total'] = summarize(
+        [value for values in latencies.values() for value in values], sum(errors.values()), elapsed
+    )
+    return report
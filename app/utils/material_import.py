@@ -0,0 +1,127 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from openpyxl import load_workbook
+
+from my_db.enums import NomType, NomUnit, NomStatus
+from my_db.models import Nomenclature, NomCount, Warehouse, Color
+
+IMPORT_COLUMNS = ['vendor_code', 'title', 'unit', 'color', 'coefficient', 'cost_price', 'status']
+IMPORT_UPDATE_FIELDS = ['title', 'unit', 'coefficient', 'cost_price', 'status']
+MAX_STORED_ERRORS = 1000
+
+
+def read_rows(file, filename):
+    """Построчно читает CSV/XLSX файл и отдает словари по колонкам IMPORT_COLUMNS."""
+    if filename.lower().endswith('.xlsx'):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip().lower() if h is not None else '' for h in next(rows, [])]
+        for row in rows:
+            if not any(v not in (None, '') for v in row):
+                continue
+            yield dict(zip(header, row))
+        workbook.close()
+    else:
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig'))
+        reader.fieldnames = [h.strip().lower() for h in reader.fieldnames or []]
+        for row in reader:
+            yield row
+
+
+def _choice(value, choices):
+    if value in (None, ''):
+        return None
+    value = str(value).strip()
+    if value.isdigit() and int(value) in choices.values:
+        return int(value)
+    for choice_value, label in choices.choices:
+        if label.lower() == value.lower():
+            return choice_value
+    raise ValueError(f'Неизвестное значение "{value}"')
+
+
+def _decimal(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value).replace(',', '.').strip())
+    except InvalidOperation:
+        raise ValueError(f'Некорректное число "{value}"')
+
+
+def parse_row(row, colors):
+    vendor_code = str(row.get('vendor_code') or '').strip()
+    title = str(row.get('title') or '').strip()
+    if not vendor_code:
+        raise ValueError('Не указан vendor_code')
+    if not title:
+        raise ValueError('Не указан title')
+
+    color_id = None
+    color = str(row.get('color') or '').strip()
+    if color:
+        color_id = colors.get(color.lower())
+        if color_id is None:
+            raise ValueError(f'Неизвестный цвет "{color}"')
+
+    optional = {
+        'unit': _choice(row.get('unit'), NomUnit),
+        'coefficient': _decimal(row.get('coefficient')),
+        'cost_price': _decimal(row.get('cost_price')),
+        'status': _choice(row.get('status'), NomStatus),
+    }
+    # пустые ячейки и отсутствующие колонки не попадают в результат: при обновлении такие поля не меняются,
+    # при создании берутся значения по умолчанию модели
+    return {
+        'vendor_code': vendor_code,
+        'title': title,
+        'color_id': color_id,
+        **{field: value for field, value in optional.items() if value is not None},
+    }
+
+
+def get_color_map():
+    colors = {}
+    for color_id, title in Color.objects.values_list('id', 'title'):
+        colors[title.lower()] = color_id
+        colors[str(color_id)] = color_id
+    return colors
+
+
+def upsert_materials(items):
+    """
+    Создает или обновляет сырье пачкой. Ключ - (vendor_code, color).
+    Для новых материалов создаются остатки на всех складах.
+    """
+    items = {(i['vendor_code'], i['color_id']): i for i in items}
+    existing = {
+        (n.vendor_code, n.color_id): n
+        for n in Nomenclature.objects.filter(
+            type=NomType.MATERIAL,
+            vendor_code__in={vendor_code for vendor_code, _ in items},
+        )
+    }
+
+    create_data = []
+    update_data = []
+    for key, item in items.items():
+        nomenclature = existing.get(key)
+        if nomenclature:
+            for field in IMPORT_UPDATE_FIELDS:
+                if field in item:
+                    setattr(nomenclature, field, item[field])
+            update_data.append(nomenclature)
+        else:
+            create_data.append(Nomenclature(type=NomType.MATERIAL, **item))
+
+    Nomenclature.objects.bulk_update(update_data, IMPORT_UPDATE_FIELDS)
+    created = Nomenclature.objects.bulk_create(create_data)
+
+    warehouse_ids = list(Warehouse.objects.values_list('id', flat=True))
+    NomCount.objects.bulk_create([
+        NomCount(warehouse_id=w, nomenclature=n) for n in created for w in warehouse_ids
+    ])
+
+    return len(created), len(update_data)
@@ -0,0 +1,68 @@
+import os
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+
+from my_db.compress import is_pending
+from my_db.storage import HASH_NAME_RE
+from tasks.media import convert_to_webp
+
+
+def convert_images_later(instances, field_name='image'):
+    """Ставит в очередь конвертацию загруженных изображений в WEBP после коммита транзакции."""
+    instances = [i for i in instances if is_pending(getattr(i, field_name).name)]
+    if not instances:
+        return
+
+    model_label = instances[0]._meta.label
+    ids = [i.pk for i in instances]
+    transaction.on_commit(lambda: convert_to_webp.delay(model_label, ids, field_name))
+
+
+def media_reference_counts():
+    """Сколько раз каждый файл упоминается в FileField/WEBPField всех моделей."""
+    counts = Counter()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if not isinstance(field, models.FileField):
+                continue
+            names = (
+                model.objects.exclude(**{field.name: ''})
+                .exclude(**{f'{field.name}__isnull': True})
+                .values_list(field.name, flat=True)
+            )
+            counts.update(names.iterator(chunk_size=2000))
+    return counts
+
+
+def find_orphan_media(storage=default_storage):
+    """
+    Файлы с хэш-именем, на которые не ссылается ни одна запись.
+    Миниатюра <hash>_<size>.webp считается используемой, пока используется <hash>.webp.
+    """
+    referenced = set(media_reference_counts())
+    deadline = time.time() - settings.MEDIA_ORPHAN_GRACE_HOURS * 3600
+
+    orphans = []
+    for directory, _, filenames in os.walk(storage.location):
+        relative_dir = os.path.relpath(directory, storage.location)
+        for filename in filenames:
+            match = HASH_NAME_RE.match(filename)
+            if not match:
+                continue
+
+            name = os.path.normpath(os.path.join(relative_dir, filename))
+            if match.group('size'):
+                owner = os.path.normpath(os.path.join(relative_dir, match.group('hash') + '.webp'))
+            else:
+                owner = name
+            if owner in referenced:
+                continue
+            if os.path.getmtime(os.path.join(directory, filename)) > deadline:
+                continue
+            orphans.append(name)
+    return orphans
@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# границы гистограммы длительности запроса, секунды
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Эндпоинт сделал больше SQL-запросов, чем разрешено в QUERY_BUDGETS (только при QUERY_BUDGET_STRICT)."""
+
+
+class RequestMetrics:
+    """Замеры одного запроса: SQL-запросы и время в БД, время представления, рендера и размер ответа."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.size = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper: вызывается на каждый SQL-запрос
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def install(self):
+        """
+        Подключает замер ко всем соединениям текущего потока, закрытие возвращённого ExitStack - отключает.
+        Соединения привязаны к потоку, поэтому под ASGI вызывать через sync_to_async - в том же потоке,
+        где выполняются ORM-запросы запроса.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing, видно во вкладке Network браузера."""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} SQL"',
+            f'view;dur={max(self.view_time - self.db_time, 0) * 1000:.1f}',
+            f'render;dur={self.render_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики процесса по эндпоинтам.
+    Каждый воркер gunicorn считает своё, поэтому в выдаче есть метка pid -
+    в Prometheus суммировать через sum without (pid) (rate(...)).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.stats = defaultdict(lambda: defaultdict(float))
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+
+    def observe(self, view, method, status, metrics):
+        with self.lock:
+            self.requests[(view, method, str(status))] += 1
+            stats = self.stats[(view, method)]
+            stats['count'] += 1
+            stats['duration'] += metrics.total_time
+            stats['queries'] += metrics.queries
+            stats['db'] += metrics.db_time
+            stats['render'] += metrics.render_time
+            stats['bytes'] += metrics.size
+            stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+
+            buckets = self.buckets[(view, method)]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if metrics.total_time <= bound:
+                    buckets[i] += 1
+
+    def render(self):
+        """Текстовый формат Prometheus (text/plain; version=0.0.4)."""
+        pid = os.getpid()
+        lines = []
+
+        def labels(view, method, **extra):
+            items = {'view': view, 'method': method, 'pid': pid, **extra}
+            return '{' + ','.join(f'{key}="{value}"' for key, value in items.items()) + '}'
+
+        with self.lock:
+            lines += ['# HELP http_requests_total Количество запросов.', '# TYPE http_requests_total counter']
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{labels(view, method, status=status)} {count}')
+
+            lines += ['# HELP http_request_duration_seconds Длительность запроса.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (view, method), buckets in sorted(self.buckets.items()):
+                stats = self.stats[(view, method)]
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{labels(view, method, le=bound)} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{labels(view, method, le="+Inf")} '
+                             f'{int(stats["count"])}')
+                lines.append(f'http_request_duration_seconds_sum{labels(view, method)} {stats["duration"]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{labels(view, method)} {int(stats["count"])}')
+
+            summaries = [
+                ('http_request_db_queries_total', 'queries', 'SQL-запросов всего.'),
+                ('http_request_db_seconds_total', 'db', 'Время в БД всего.'),
+                ('http_request_render_seconds_total', 'render', 'Время рендера ответа (JSON) всего.'),
+                ('http_response_bytes_total', 'bytes', 'Размер ответов всего.'),
+            ]
+            for name, key, description in summaries:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+                for (view, method), stats in sorted(self.stats.items()):
+                    lines.append(f'{name}{labels(view, method)} {stats[key]:g}')
+
+            lines += ['# HELP http_request_db_queries_max Максимум SQL-запросов за один запрос.',
+                      '# TYPE http_request_db_queries_max gauge']
+            for (view, method), stats in sorted(self.stats.items()):
+                lines.append(f'http_request_db_queries_max{labels(view, method)} {int(stats["max_queries"])}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def check_query_budget(view, method, metrics):
+    """Бюджет из settings.QUERY_BUDGETS: {'order-detail': 30, ...} или {'order-detail': {'GET': 30}}."""
+    budget = settings.QUERY_BUDGETS.get(view, settings.QUERY_BUDGET_DEFAULT)
+    if isinstance(budget, dict):
+        budget = budget.get(method, settings.QUERY_BUDGET_DEFAULT)
+    if budget is None or metrics.queries <= budget:
+        return
+
+    message = f'{method} {view}: {metrics.queries} SQL-запросов при бюджете {budget}'
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -1,8 +1,94 @@
+from django.db.models import Q
+
 from my_db.enums import CombinationStatus
+from my_db.models import Combination, Operation
+from my_db.signals import combination_totals_deferred
+from utils.combination import recalculate_combination_totals
+
+COMBINATION_FIELDS = ['title', 'status']
+OPERATION_FIELDS = ['title', 'price', 'time', 'equipment', 'rank', 'is_active']
 
 
 def has_cut_combination(combinations):
     for combo in combinations:
         if combo.get('status') == CombinationStatus.CUT:
             return True
-    return False
\ No newline at end of file
+    return False
+
+
+def assign(instance, data, exclude=()):
+    """Переносит поля из data в объект, возвращает True, если что-то изменилось."""
+    changed = False
+    for field, value in data.items():
+        if field not in exclude and getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed = True
+    return changed
+
+
+def save_tech_card(nomenclature, combinations_data):
+    """
+    Записывает комбинации и операции изделия за фиксированное число запросов, сколько бы их ни было:
+    существующие строки (по id из данных) обновляются, новые создаются, отсутствующие в данных удаляются.
+    Комбинации сохраняют id, поэтому выполненные работы (WorkDetail.combination) не теряют ссылку.
+    """
+    through = Combination.operations.through
+    existing_combinations = {combination.id: combination for combination in nomenclature.combinations.all()}
+    existing_operations = {operation.id: operation for operation in nomenclature.operations.all()}
+    existing_links = {
+        (combination_id, operation_id): pk for pk, combination_id, operation_id in
+        through.objects.filter(combination__nomenclature=nomenclature)
+        .values_list('id', 'combination_id', 'operation_id')
+    }
+
+    combinations, new_combinations, new_operations = [], [], []
+    kept_combinations, kept_operations = {}, {}
+    changed_combinations, changed_operations = {}, {}
+    for data in combinations_data:
+        combination = existing_combinations.get(data.get('id'))
+        if combination is None:
+            combination = Combination(nomenclature=nomenclature)
+            new_combinations.append(combination)
+        else:
+            kept_combinations[combination.id] = combination
+        if assign(combination, data, exclude=('id', 'operations')) and combination.pk:
+            changed_combinations[combination.id] = combination
+
+        operations = []
+        for operation_data in data.get('operations', []):
+            operation = existing_operations.get(operation_data.get('id'))
+            if operation is None:
+                operation = Operation(nomenclature=nomenclature)
+                new_operations.append(operation)
+            else:
+                kept_operations[operation.id] = operation
+            if assign(operation, operation_data, exclude=('id',)) and operation.pk:
+                changed_operations[operation.id] = operation
+            operations.append(operation)
+        combinations.append((combination, operations))
+
+    removed_combinations = existing_combinations.keys() - kept_combinations.keys()
+    removed_operations = existing_operations.keys() - kept_operations.keys()
+    if removed_combinations:
+        Combination.objects.filter(id__in=removed_combinations).delete()
+
+    Operation.objects.bulk_create(new_operations)
+    Combination.objects.bulk_create(new_combinations)
+    # обновляются только изменившиеся строки: повторное сохранение без правок не пишет ничего
+    Operation.objects.bulk_update(changed_operations.values(), OPERATION_FIELDS)
+    Combination.objects.bulk_update(changed_combinations.values(), COMBINATION_FIELDS)
+
+    links = {(combination.id, operation.id) for combination, operations in combinations for operation in operations}
+    stale = [pk for key, pk in existing_links.items() if key not in links and key[0] not in removed_combinations]
+    if stale or removed_operations:
+        through.objects.filter(Q(id__in=stale) | Q(operation_id__in=removed_operations)).delete()
+    through.objects.bulk_create([
+        through(combination_id=combination_id, operation_id=operation_id)
+        for combination_id, operation_id in links - existing_links.keys()
+    ])
+    if removed_operations:
+        # суммы комбинаций пересчитываются ниже одним запросом, построчный пересчёт в сигналах не нужен
+        with combination_totals_deferred():
+            Operation.objects.filter(id__in=removed_operations).delete()
+
+    recalculate_combination_totals([combination.id for combination, _ in combinations])
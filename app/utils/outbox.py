@@ -0,0 +1,50 @@
+import hashlib
+import json
+
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from main_conf.celery import app
+from my_db.models import OutboxMessage
+
+RELAY_BATCH_SIZE = 100
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Вместо task.delay(...) внутри транзакции: задача записывается в outbox в той же транзакции
+    и отправляется в брокер только после коммита. Откат транзакции отменяет и задачу.
+    Одинаковые (задача + аргументы) неотправленные задачи склеиваются в одну.
+    Если брокер недоступен, сообщение остаётся в таблице и его отправит relay_outbox.
+    """
+    payload = json.dumps([task.name, args, kwargs], sort_keys=True, default=str)
+    dedup_key = hashlib.sha256(payload.encode()).hexdigest()
+
+    try:
+        with transaction.atomic():
+            message = OutboxMessage.objects.create(task=task.name, args=list(args), kwargs=kwargs,
+                                                   dedup_key=dedup_key)
+    except IntegrityError:
+        return
+
+    transaction.on_commit(lambda: dispatch([message.id]))
+
+
+def dispatch(ids=None, limit=RELAY_BATCH_SIZE):
+    """Отправляет неотправленные сообщения. Занятые другим процессом строки пропускаются (skip_locked)."""
+    sent = 0
+    with transaction.atomic():
+        messages = OutboxMessage.objects.select_for_update(skip_locked=True).filter(sent_at__isnull=True)
+        if ids is not None:
+            messages = messages.filter(id__in=ids)
+
+        for message in messages.order_by('id')[:limit]:
+            try:
+                app.send_task(message.task, args=message.args, kwargs=message.kwargs)
+            except Exception as e:
+                OutboxMessage.objects.filter(id=message.id).update(attempts=message.attempts + 1, last_error=str(e))
+                continue
+            OutboxMessage.objects.filter(id=message.id).update(sent_at=timezone.now(),
+                                                               attempts=message.attempts + 1)
+            sent += 1
+    return sent
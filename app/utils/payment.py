@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, F, Case, When, Value, DecimalField, BigIntegerField, IntegerField
+
+from my_db.enums import PaymentStatus, WorkStatus
+from my_db.models import Payment, WorkDetail, PaymentLine
+
+
+def calculate_salaries(staff_ids, work_ids):
+    earned = (
+        WorkDetail.objects.filter(id__in=work_ids)
+        .values('staff_id')
+        .annotate(total=Sum(F('amount') * F('combination__total_price'), output_field=DecimalField()))
+    )
+    deductions = (
+        Payment.objects.filter(staff_id__in=staff_ids, status__in=[PaymentStatus.FINE, PaymentStatus.ADVANCE])
+        .values('staff_id')
+        .annotate(total=Sum('amount'))
+    )
+    deductions = {d['staff_id']: d['total'] or Decimal(0) for d in deductions}
+
+    return {
+        e['staff_id']: (e['total'] or Decimal(0)) - deductions.get(e['staff_id'], Decimal(0))
+        for e in earned
+    }
+
+
+def create_payment_lines(payment_ids):
+    works = (
+        WorkDetail.objects.filter(payment_id__in=payment_ids)
+        .values(
+            'payment_id',
+            'combination_id',
+            'combination__title',
+            'combination__total_price',
+            'work__party__number',
+            'work__party__order_id',
+        )
+        .annotate(total_amount=Sum('amount'))
+    )
+
+    return PaymentLine.objects.bulk_create([
+        PaymentLine(
+            payment_id=w['payment_id'],
+            combination_id=w['combination_id'],
+            combination_title=w['combination__title'] or '',
+            price=w['combination__total_price'] or 0,
+            amount=w['total_amount'] or 0,
+            total_price=(w['combination__total_price'] or 0) * (w['total_amount'] or 0),
+            party_number=w['work__party__number'],
+            order_id=w['work__party__order_id'],
+        )
+        for w in works
+    ])
+
+
+def close_salary_period(staff_amounts, date_from, date_until, work_ids=None):
+    """
+    Создает выплаты ЗП сотрудникам, помечает их работы оплаченными и учитывает авансы/штрафы.
+    staff_amounts: {staff_id: сумма}. Если work_ids не передан, оплачиваются все новые работы сотрудников.
+    """
+    if not staff_amounts:
+        return []
+
+    with transaction.atomic():
+        payments = Payment.objects.bulk_create([
+            Payment(
+                staff_id=staff_id,
+                status=PaymentStatus.SALARY,
+                amount=amount,
+                date_from=date_from,
+                date_until=date_until,
+            )
+            for staff_id, amount in staff_amounts.items()
+        ])
+
+        works = WorkDetail.objects.filter(staff_id__in=staff_amounts, status=WorkStatus.NEW)
+        if work_ids is not None:
+            works = works.filter(id__in=work_ids)
+        works.update(
+            status=WorkStatus.PAID,
+            payment=Case(
+                *[When(staff_id=p.staff_id, then=Value(p.id)) for p in payments],
+                output_field=BigIntegerField()
+            )
+        )
+
+        create_payment_lines([p.id for p in payments])
+
+        Payment.objects.filter(
+            staff_id__in=staff_amounts,
+            status__in=[PaymentStatus.FINE, PaymentStatus.ADVANCE]
+        ).update(
+            status=Case(
+                When(status=PaymentStatus.ADVANCE, then=Value(PaymentStatus.ADVANCE_CHECKED)),
+                default=Value(PaymentStatus.FINE_CHECKED),
+                output_field=IntegerField()
+            )
+        )
+
+    return payments
+
+
+def pay_salaries(staff_ids, date_from, date_until):
+    with transaction.atomic():
+        work_ids = list(
+            WorkDetail.objects.select_for_update().filter(
+                staff_id__in=staff_ids,
+                status=WorkStatus.NEW,
+                created_at__date__lte=date_until,
+            ).values_list('id', flat=True)
+        )
+        staff_amounts = calculate_salaries(staff_ids, work_ids)
+        return close_salary_period(staff_amounts, date_from, date_until, work_ids)
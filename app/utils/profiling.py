@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'profiles.jsonl'
+MAX_STACK_DEPTH = 200
+
+
+def fold_stack(frame):
+    """Стек в формате folded (flamegraph.pl, speedscope): корень;...;вершина."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(f'{frame.f_globals.get("__name__", "?")}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Один фоновый поток на процесс: раз в interval снимает стеки потоков, зарегистрированных через start().
+    Запрос при этом не замедляется - стоимость ложится на поток сэмплера, пока есть что сэмплировать.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self, thread_id):
+        counter = Counter()
+        with self.lock:
+            self.active[thread_id] = counter
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return counter
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            if not self.active:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, counter in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        counter[fold_stack(frame)] += 1
+            del frames
+
+
+_sampler = None
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+    return _sampler
+
+
+def save_profile(meta, folded=None, stats=None):
+    """
+    Сохраняет профиль в PROFILE_DIR: folded-стеки (.folded) или pstats cProfile (.prof),
+    и строку с метаданными в profiles.jsonl. Старые файлы сверх PROFILE_MAX_FILES удаляются.
+    """
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    view = meta['view'].replace('/', '_').replace('.', '_')[-80:]
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{int(meta["duration_ms"])}ms-{view}'
+
+    if stats is not None:
+        name += '.prof'
+        stats.dump_stats(os.path.join(directory, name))
+    else:
+        name += '.folded'
+        with open(os.path.join(directory, name), 'w') as file:
+            file.writelines(f'{stack} {count}\n' for stack, count in folded.most_common())
+
+    line = json.dumps({**meta, 'file': name}, ensure_ascii=False) + '\n'
+    fd = os.open(os.path.join(directory, INDEX_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+    prune_profiles(directory)
+
+
+def prune_profiles(directory):
+    files = [entry for entry in os.scandir(directory) if entry.name.endswith(('.folded', '.prof'))]
+    if len(files) <= settings.PROFILE_MAX_FILES:
+        return
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:len(files) - settings.PROFILE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def read_profiles(directory):
+    """Метаданные сохранённых профилей, файлы которых ещё не удалены."""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    return [record for record in records if os.path.exists(os.path.join(directory, record['file']))]
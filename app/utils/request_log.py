@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+
+from my_db.enums import UserStatus, StaffRole
+
+# значения этих ключей (в любом месте тела) в журнал не попадают
+SENSITIVE_KEYS = {'password', 'password2', 'old_password', 'token', 'access', 'refresh', 'secret', 'phone'}
+MASK = '***'
+
+
+def sanitize(data):
+    if isinstance(data, dict):
+        return {key: MASK if key.lower() in SENSITIVE_KEYS else sanitize(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [sanitize(item) for item in data]
+    return data
+
+
+def user_role(user):
+    """Роль для журнала: при воспроизведении запрос отправляется от пользователя с той же ролью."""
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.status == UserStatus.STAFF and hasattr(user, 'staff_profile'):
+        return StaffRole(user.staff_profile.role).name.lower()
+    if user.status == UserStatus.CLIENT:
+        return 'client'
+    return 'admin'
+
+
+class RequestLogWriter:
+    """
+    Дописывает записи в JSONL-файл. Файл открыт с O_APPEND и каждая запись пишется одним write,
+    поэтому несколько воркеров gunicorn могут писать в один файл.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fd = None
+
+    def write(self, record):
+        line = (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode()
+        with self.lock:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+            os.write(self.fd, line)
+
+
+def read_request_log(path, since=None, until=None, route=None):
+    """Записи журнала по порядку; since/until - ISO-время, route - подстрока маршрута (view_name) или пути."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if since and record['ts'] < since:
+                continue
+            if until and record['ts'] > until:
+                continue
+            if route and route not in record.get('route', '') and route not in record['path']:
+                continue
+            yield record
@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from my_db.enums import OrderStatus, StaffRole
+from my_db.models import Order, OrderProductAmount, WorkDetail, Combination, StaffProfile, Rank
+
+# заказы, которые ещё нужно произвести
+ACTIVE_ORDER_STATUSES = [OrderStatus.NEW, OrderStatus.PROGRESS, OrderStatus.OVERDUE]
+# сотрудники, чьё время распределяется по операциям
+PRODUCTION_ROLES = [StaffRole.SEAMSTRESS, StaffRole.CUTTER, StaffRole.OTK]
+
+
+def rank_levels():
+    """Уровни квалификации: 0 - без разряда, далее разряды по возрастанию процента. {rank_id: уровень}, названия."""
+    ranks = list(Rank.objects.order_by('percent', 'id').values_list('id', 'title'))
+    return {rank_id: level for level, (rank_id, _) in enumerate(ranks, start=1)}, ['Без разряда'] + [t for _, t in ranks]
+
+
+def order_demand(orders, levels):
+    """
+    Оставшаяся работа по заказам в секундах: матрица [заказ, уровень разряда].
+    Остаток считается по каждой ячейке размер/цвет и каждой комбинации: заказано минус уже выполнено (WorkDetail),
+    затем умножается на время операций комбинации, разложенное по требуемым разрядам.
+    """
+    order_index = {order['id']: i for i, order in enumerate(orders)}
+    demand = np.zeros((len(orders), len(levels) + 1))
+    if not orders:
+        return demand
+
+    cells = (
+        OrderProductAmount.objects.filter(order_product__order_id__in=order_index)
+        .values_list('order_product__order_id', 'order_product__nomenclature_id', 'size_id', 'color_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    done = {
+        key[:5]: key[5] for key in
+        WorkDetail.objects.filter(work__party__order_id__in=order_index)
+        .values_list('work__party__order_id', 'work__party__nomenclature_id', 'work__size_id', 'work__color_id',
+                     'combination_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    }
+
+    cells = list(cells)
+    products = {cell[1] for cell in cells}
+    links = list(
+        Combination.operations.through.objects
+        .filter(combination__nomenclature_id__in=products, operation__is_active=True)
+        .values_list('combination_id', 'combination__nomenclature_id', 'operation__time', 'operation__rank_id')
+    )
+
+    # время одной единицы комбинации по уровням разряда
+    combination_index = {}
+    product_combinations = {}
+    for combination_id, product_id, _, _ in links:
+        if combination_id not in combination_index:
+            combination_index[combination_id] = len(combination_index)
+            product_combinations.setdefault(product_id, []).append(combination_id)
+    unit_time = np.zeros((len(combination_index), len(levels) + 1))
+    if links:
+        rows = np.array([combination_index[link[0]] for link in links])
+        columns = np.array([levels.get(link[3], 0) for link in links])
+        np.add.at(unit_time, (rows, columns), np.array([link[2] for link in links], dtype=float))
+
+    order_rows, combination_rows, ordered, completed = [], [], [], []
+    for order_id, product_id, size_id, color_id, total in cells:
+        for combination_id in product_combinations.get(product_id, []):
+            order_rows.append(order_index[order_id])
+            combination_rows.append(combination_index[combination_id])
+            ordered.append(total)
+            completed.append(done.get((order_id, product_id, size_id, color_id, combination_id), 0))
+    if not order_rows:
+        return demand
+
+    remaining = np.maximum(np.array(ordered, dtype=float) - np.array(completed, dtype=float), 0)
+    np.add.at(demand, np.array(order_rows), remaining[:, None] * unit_time[np.array(combination_rows)])
+    return demand
+
+
+def work_days_to_datetimes(days, now):
+    """Смещение в рабочих днях от now -> datetime с учётом выходных (SCHEDULE_WEEKMASK) и рабочих часов."""
+    start_hour, hours = settings.SCHEDULE_WORKDAY_START, settings.SCHEDULE_WORKDAY_HOURS
+    today = np.datetime64(now.date())
+    elapsed = 0.0
+    if np.is_busday(today, weekmask=settings.SCHEDULE_WEEKMASK):
+        elapsed = min(max((now.hour + now.minute / 60 - start_hour) / hours, 0), 1)
+
+    finite = np.isfinite(days)
+    offset = np.where(finite, days, 0) + elapsed
+    whole = np.floor(offset)
+    dates = np.busday_offset(today, whole.astype(int), roll='forward', weekmask=settings.SCHEDULE_WEEKMASK)
+    seconds = np.round((start_hour + (offset - whole) * hours) * 3600).astype('timedelta64[s]')
+    moments = (dates.astype('datetime64[s]') + seconds).astype(object)
+    return [timezone.make_aware(moment) if ok else None for moment, ok in zip(moments, finite)]
+
+
+def build_schedule(now=None):
+    """
+    Прогноз выполнения заказов в работе: earliest-deadline-first с учётом разрядов.
+    Работа считается делимой между сотрудниками: операцию уровня L может выполнять любой сотрудник с разрядом >= L.
+    При вложенных разрядах EDF-очередь из первых k заказов закончится через
+    max по L (работа уровня >= L в этих заказах / мощность сотрудников уровня >= L) рабочих дней -
+    это считается сразу для всех заказов и уровней накопительными суммами numpy.
+    """
+    now = timezone.localtime(now or timezone.now())
+    levels, titles = rank_levels()
+    orders = list(
+        Order.objects.filter(status__in=ACTIVE_ORDER_STATUSES)
+        .order_by('deadline', 'id')
+        .values('id', 'client__name', 'status', 'deadline')
+    )
+    demand = order_demand(orders, levels)
+
+    # мощность в секундах за рабочий день для каждого уровня: все сотрудники с разрядом не ниже
+    staff_levels = np.array([
+        levels.get(rank_id, 0) for rank_id in
+        StaffProfile.objects.filter(role__in=PRODUCTION_ROLES).values_list('rank_id', flat=True)
+    ], dtype=int)
+    staff_per_level = np.bincount(staff_levels, minlength=len(titles)) if len(staff_levels) else np.zeros(len(titles))
+    day_seconds = settings.SCHEDULE_WORKDAY_HOURS * 3600 * settings.SCHEDULE_EFFICIENCY
+    capacity = staff_per_level[::-1].cumsum()[::-1] * day_seconds
+
+    # работа уровня >= L, накопленная по EDF-очереди
+    required = demand[:, ::-1].cumsum(axis=1)[:, ::-1].cumsum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_by_level = np.where(required > 0, required / capacity, 0)
+    end_days = days_by_level.max(axis=1) if len(orders) else np.zeros(0)
+    bottleneck = days_by_level.argmax(axis=1) if len(orders) else np.zeros(0, dtype=int)
+    start_days = np.concatenate([[0], end_days[:-1]])
+
+    starts = work_days_to_datetimes(start_days, now)
+    ends = work_days_to_datetimes(end_days, now)
+
+    result = []
+    for i, order in enumerate(orders):
+        deadline, end = order['deadline'], ends[i]
+        if deadline < now:
+            risk = 'overdue'
+        elif end is None or end > deadline:
+            risk = 'at_risk'
+        else:
+            risk = 'ok'
+        result.append({
+            'id': order['id'],
+            'client': order['client__name'],
+            'status': order['status'],
+            'deadline': deadline,
+            'remaining_hours': round(float(demand[i].sum()) / 3600, 1),
+            'projected_start': starts[i],
+            'projected_end': end,
+            'slack_hours': round((deadline - end) / timedelta(hours=1), 1) if end else None,
+            # уровень 0 - не хватает общей мощности, а не сотрудников конкретного разряда
+            'bottleneck_rank': titles[bottleneck[i]] if bottleneck[i] else None,
+            'risk': risk,
+        })
+
+    return {
+        'generated_at': now,
+        'ranks': [
+            {
+                'rank': title,
+                'staff': int(staff_per_level[level]),
+                'capacity_hours_per_day': round(float(capacity[level]) / 3600, 1),
+                'demand_hours': round(float(demand[:, level].sum()) / 3600, 1),
+            }
+            for level, title in enumerate(titles)
+        ],
+        'orders': result,
+    }
@@ -0,0 +1,111 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from my_db.enums import UploadTarget, UploadStatus
+from my_db.models import ChunkedUpload, NomFile, ClientFile, PaymentFile, QuantityFile, Nomenclature, ClientProfile, Payment, \
+    Quantity
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# цель загрузки -> (модель файла, поле-владелец, модель владельца)
+UPLOAD_TARGETS = {
+    UploadTarget.NOM_FILE: (NomFile, 'nomenclature', Nomenclature),
+    UploadTarget.CLIENT_FILE: (ClientFile, 'client', ClientProfile),
+    UploadTarget.PAYMENT_FILE: (PaymentFile, 'payment', Payment),
+    UploadTarget.QUANTITY_FILE: (QuantityFile, 'quantity', Quantity),
+}
+
+
+def part_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload.id}.part')
+
+
+def stored_size(upload):
+    """Сколько байт загрузки реально лежит на диске (0, если .part файла нет)."""
+    try:
+        return os.path.getsize(part_path(upload))
+    except FileNotFoundError:
+        return 0
+
+
+def sync_offset(upload):
+    """
+    Сверяет upload.offset с размером .part файла: если на диске меньше (файл потерян при пересоздании контейнера
+    или обрезан), offset откатывается к реальному размеру. Возвращает True, если offset изменился.
+    """
+    size = stored_size(upload)
+    if size >= upload.offset:
+        return False
+    upload.offset = size
+    upload.save(update_fields=['offset', 'updated_at'])
+    return True
+
+
+def write_chunk(upload, stream, offset):
+    """
+    Дописывает тело запроса в .part файл начиная с offset, читая поток кусками по 64 КБ.
+    Всё, что было записано после offset (оборванная часть), отбрасывается. Возвращает новое смещение.
+    offset не может быть больше размера файла на диске - пропуск заполнился бы нулями.
+    """
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    path = part_path(upload)
+    if offset > stored_size(upload):
+        raise ValueError(f'offset {offset} больше размера {path}')
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+
+    with open(path, mode) as f:
+        f.seek(offset)
+        f.truncate()
+        remaining = upload.size - offset
+        while remaining > 0:
+            data = stream.read(min(READ_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+        return f.tell()
+
+
+def attach_upload(upload):
+    """Создаёт запись файла у владельца (NomFile, ClientFile, ...) из собранного файла и удаляет .part."""
+    model, owner_field, _ = UPLOAD_TARGETS[upload.target]
+    path = part_path(upload)
+
+    with open(path, 'rb') as f:
+        obj = model.objects.create(**{f'{owner_field}_id': upload.object_id, 'file': File(f, name=upload.filename)})
+
+    os.remove(path)
+    return obj
+
+
+def discard_upload(upload):
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def cleanup_stale_uploads(hours):
+    """
+    Удаляет брошенные загрузки: незавершённые, в которые не писали дольше hours часов, вместе с .part файлами,
+    и .part файлы такого же возраста без незавершённой загрузки (например, пользователь удалён).
+    Возвращает число удалённых загрузок и файлов.
+    """
+    stale = ChunkedUpload.objects.filter(status=UploadStatus.NEW, updated_at__lt=timezone.now() - timedelta(hours=hours))
+    for upload in stale:
+        discard_upload(upload)
+    removed, _ = stale.delete()
+
+    if not os.path.isdir(settings.CHUNKED_UPLOAD_DIR):
+        return removed
+    active = {f'{pk}.part' for pk in ChunkedUpload.objects.filter(status=UploadStatus.NEW).values_list('id', flat=True)}
+    deadline = time.time() - hours * 3600
+    for entry in os.scandir(settings.CHUNKED_UPLOAD_DIR):
+        if entry.name.endswith('.part') and entry.name not in active and entry.stat().st_mtime < deadline:
+            os.remove(entry.path)
+            removed += 1
+    return removed